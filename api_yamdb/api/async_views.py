@@ -0,0 +1,82 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
+from django.urls import URLPattern
+
+from api_yamdb.dbconnections import recycle_connections
+
+# Горячие эндпоинты чтения, которые под ASGI обслуживаются async view.
+ASYNC_READ_URL_NAMES = (
+    'title-list',
+    'title-detail',
+    'category-list',
+    'genre-list',
+    'review-list',
+)
+
+
+def run_view(view, request, *args, **kwargs):
+    # Выполняется в потоке из пула, поэтому соединения с базой этого
+    # потока проверяются так же, как сигналами начала и конца запроса.
+    recycle_connections(health_check=True)
+    try:
+        response = view(request, *args, **kwargs)
+        if response.streaming:
+            # Django 3.2 читает потоковый ответ прямо в цикле событий, где
+            # ORM недоступен, поэтому тело читается здесь. Заголовки и
+            # cookies остаются в том же ответе.
+            response.streaming_content = list(response.streaming_content)
+            return response
+        response.render()
+        # Готовый HttpResponse: иначе Django ещё раз передал бы ответ на
+        # рендеринг в общий поток синхронного кода.
+        result = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            result[header] = value
+        result.cookies = response.cookies
+        return result
+    finally:
+        recycle_connections()
+
+
+def as_async_view(view):
+    # Синхронные view Django 3.2 под ASGI выполняет в одном общем потоке,
+    # и запросы ждут друг друга. Async view отдаёт каждый запрос целиком
+    # (запросы к базе, сериализацию и рендеринг) отдельному потоку из
+    # пула — одна передача в поток вместо нескольких, без общей очереди.
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await sync_to_async(run_view, thread_sensitive=False)(
+            view, request, *args, **kwargs
+        )
+    return async_view
+
+
+def async_read_urls(patterns, names=ASYNC_READ_URL_NAMES):
+    return [
+        URLPattern(
+            pattern.pattern,
+            as_async_view(pattern.callback),
+            pattern.default_args,
+            pattern.name
+        )
+        if pattern.name in names else pattern
+        for pattern in patterns
+    ]
+
+
+class BufferStreamingMiddleware:
+    # Остальные потоковые ответы (выгрузки, ?stream=true у комментариев и
+    # пользователей) отдают синхронные view. Тело Django 3.2 под ASGI
+    # тоже читал бы в цикле событий, а синхронный middleware выполняется
+    # в потоке, где ORM доступен, поэтому тело читается здесь.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming and isinstance(request, ASGIRequest):
+            response.streaming_content = list(response.streaming_content)
+        return response
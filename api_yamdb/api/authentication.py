@@ -0,0 +1,153 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import User
+
+from api_yamdb.checks import is_process_local
+
+TOKEN_VERSION_KEY = 'token-version:{}'
+USER_CLAIMS = ('username', 'role', 'is_staff', 'token_version')
+
+
+def get_token_for_user(user):
+    token = RefreshToken.for_user(user).access_token
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def read_token_version(user_id):
+    # Версия читается из основной базы: отставание реплики не должно
+    # продлевать жизнь отозванным токенам.
+    return User.objects.using(DEFAULT_DB_ALIAS).filter(
+        pk=user_id, is_active=True
+    ).values_list('token_version', flat=True).first()
+
+
+def get_token_version(user_id):
+    alias = settings.TOKEN_VERSION_CACHE_ALIAS
+    if is_process_local(alias):
+        # Отзыв сбросил бы запись только в кеше своего воркера, а другие
+        # принимали бы токен до истечения таймаута.
+        return read_token_version(user_id)
+    cache = caches[alias]
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = read_token_version(user_id)
+        if version is None:
+            return None
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def forget_user(user_id):
+    caches[settings.TOKEN_VERSION_CACHE_ALIAS].delete(
+        TOKEN_VERSION_KEY.format(user_id)
+    )
+    user_cache.invalidate(user_id)
+
+
+def revoke_tokens(user, using=DEFAULT_DB_ALIAS):
+    User.objects.using(using).filter(pk=user.pk).update(
+        token_version=F('token_version') + 1
+    )
+    # Иначе следующий save() объекта вернул бы старую версию.
+    user.refresh_from_db(using=using, fields=['token_version'])
+
+
+def load_user(user_id):
+    try:
+        return User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        raise AuthenticationFailed(
+            'Пользователь не найден.', code='user_not_found'
+        )
+
+
+class UserCache:
+    # Небольшой LRU-кеш пользователей в памяти процесса для эндпоинтов,
+    # которым нужен настоящий объект User (например, автор отзыва).
+    # Сбрасывается только в своём процессе, поэтому данные, которые
+    # видит пользователь (/users/me/), читаются из базы.
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.users = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            cached = self.users.get(user_id)
+            if cached is not None and cached[1] > now:
+                self.users.move_to_end(user_id)
+                return cached[0]
+        user = load_user(user_id)
+        with self.lock:
+            self.users[user_id] = (user, now + self.timeout)
+            self.users.move_to_end(user_id)
+            while len(self.users) > self.size:
+                self.users.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.users.pop(user_id, None)
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TIMEOUT)
+
+
+def get_full_user(user):
+    if isinstance(user, User):
+        return user
+    return user_cache.get(user.pk)
+
+
+class StatelessUser(TokenUser):
+    def __str__(self):
+        return self.username
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def is_moderator(self):
+        return self.role == 'moderator'
+
+    @property
+    def is_user(self):
+        return self.role == 'user'
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    # Пользователь восстанавливается из клейма токена без запроса к
+    # users_user. Актуальность роли проверяется по версии токена.
+    def get_user(self, validated_token):
+        if not settings.STATELESS_JWT_AUTH or any(
+            claim not in validated_token for claim in USER_CLAIMS
+        ):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if validated_token['token_version'] != get_token_version(user_id):
+            raise AuthenticationFailed(
+                'Токен отозван, получите новый.', code='token_revoked'
+            )
+        return StatelessUser(validated_token)
@@ -0,0 +1,72 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+from api_yamdb.metrics import counter_totals, registry
+
+VERSION_KEY = 'catalog-version:{}'
+RESPONSE_KEY = 'catalog-response:{}'
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _increment(key, initial=0):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial)
+        return cache.incr(key)
+
+
+def _initial_version():
+    # Версию начинаем с текущего времени, чтобы после вытеснения ключа
+    # из кеша она не вернулась к уже использованному значению.
+    return time.time_ns()
+
+
+def get_versions(labels):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version())
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(label):
+    return _increment(VERSION_KEY.format(label), _initial_version())
+
+
+def make_response_key(request, labels):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    versions = ','.join(map(str, get_versions(labels)))
+    raw = f'{request.build_absolute_uri(request.path)}?{query}|{versions}'
+    return RESPONSE_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def get_response(key):
+    data = get_cache().get(key)
+    # Попадания считаются в памяти воркера и сбрасываются в файл метрик
+    # вместе с остальными счётчиками, без лишнего обращения к кешу.
+    registry.inc(
+        'yamdb_catalog_cache_requests_total',
+        {'result': 'miss' if data is None else 'hit'}
+    )
+    return data
+
+
+def set_response(key, data):
+    get_cache().set(key, data, settings.CATALOG_CACHE_TIMEOUT)
+
+
+def get_stats():
+    totals = counter_totals('yamdb_catalog_cache_requests_total', 'result')
+    return {'hits': totals.get('hit', 0), 'misses': totals.get('miss', 0)}
@@ -1,11 +1,49 @@
-from django_filters import CharFilter, FilterSet
+from django.db.models import Count
+from django_filters import (BaseInFilter, CharFilter, ChoiceFilter, FilterSet,
+                            NumberFilter)
 from reviews.models import Title
+from reviews.search import search_titles
+
+GenreTitle = Title.genre.through
+
+
+class CharInFilter(BaseInFilter, CharFilter):
+    pass
 
 
 class TitleFilter(FilterSet):
-    genre = CharFilter('genre__slug', lookup_expr='icontains')
-    category = CharFilter('category__slug', lookup_expr='icontains')
+    ANY = 'any'
+    ALL = 'all'
+    GENRE_MODES = (
+        (ANY, 'Хотя бы один из жанров'),
+        (ALL, 'Все жанры'),
+    )
+
+    genre = CharInFilter(method='filter_genre')
+    genre_mode = ChoiceFilter(choices=GENRE_MODES, method='filter_noop')
+    category = CharFilter('category__slug')
+    category__in = CharInFilter('category__slug', lookup_expr='in')
+    year_min = NumberFilter('year', lookup_expr='gte')
+    year_max = NumberFilter('year', lookup_expr='lte')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('genre', 'category', 'name', 'year')
+
+    def filter_noop(self, queryset, name, value):
+        return queryset
+
+    def filter_genre(self, queryset, name, value):
+        # Фильтруем через подзапрос к связующей таблице: JOIN с жанрами
+        # размножил бы строки произведений.
+        slugs = set(value)
+        links = GenreTitle.objects.filter(genre__slug__in=slugs)
+        if self.form.cleaned_data.get('genre_mode') == self.ALL:
+            links = links.values('title_id').annotate(
+                genres=Count('genre_id', distinct=True)
+            ).filter(genres=len(slugs))
+        return queryset.filter(id__in=links.values('title_id'))
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
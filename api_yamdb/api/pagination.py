@@ -0,0 +1,50 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    # Курсорный режим включается параметром ?pagination=cursor, дальше
+    # клиент идёт по ссылкам next/previous с параметром cursor.
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    # Параметры со своим порядком (поиск по релевантности): курсор
+    # сортирует по cursor_ordering и этот порядок потерял бы.
+    ordered_query_params = ('search',)
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or CursorPagination.cursor_query_param in request.query_params
+        )
+
+    def get_cursor_paginator(self, view):
+        paginator = CursorPagination()
+        paginator.page_size = self.page_size
+        paginator.ordering = getattr(view, 'cursor_ordering', ('id',))
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request):
+            self.cursor_paginator = None
+            return super().paginate_queryset(queryset, request, view)
+        for param in self.ordered_query_params:
+            if request.query_params.get(param):
+                raise ValidationError({
+                    self.mode_query_param: (
+                        'Курсорная пагинация недоступна с параметром '
+                        f'{param}.'
+                    )
+                })
+        self.cursor_paginator = self.get_cursor_paginator(view)
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -29,5 +29,5 @@ class IsAdminOrModeratorOrOwner(permissions.BasePermission):
         return (
             request.user.is_admin
             or request.user.is_moderator
-            or request.user == obj.author
+            or request.user.pk == obj.author_id
         )
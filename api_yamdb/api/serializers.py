@@ -1,12 +1,35 @@
 import datetime as dt
 import re
+from collections import OrderedDict
 
 from django.core.validators import EmailValidator
-from django.shortcuts import get_object_or_404
+from django.db import connection, transaction
+from django.utils import timezone
 from rest_framework import serializers
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.search import index_title
 from users.models import User
 
+from .cache import bump_version
+
+GenreTitle = Title.genre.through
+
+
+def save_titles(created, updated):
+    # bulk_create возвращает id только там, где база это умеет
+    # (PostgreSQL); в остальных случаях сохраняем по одному.
+    if connection.features.can_return_rows_from_bulk_insert:
+        Title.objects.bulk_create(created)
+    else:
+        for title in created:
+            title.save()
+    Title.objects.bulk_update(
+        updated,
+        ('name', 'year', 'description', 'category', 'updated_at')
+    )
+    for title in updated:
+        index_title(title, connection.alias)
+
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -31,13 +54,60 @@ class ReadTitleSerializer(serializers.ModelSerializer):
                   'genre', 'category', 'rating')
 
     def get_rating(self, obj):
-        sum = 0
-        reviews = obj.reviews.all()
-        for review in reviews:
-            sum += review.score
-        if sum == 0:
-            return None
-        return sum / len(reviews)
+        return obj.rating
+
+
+class ReadTitleRowSerializer:
+    # Тот же ответ, что у ReadTitleSerializer, но собранный из строк
+    # values() и словаря жанров, без моделей и полей DRF. Используется
+    # для списка произведений.
+    fields = (
+        'id', 'name', 'year', 'description', 'rating_sum', 'rating_count',
+        'category__name', 'category__slug',
+    )
+
+    def get_rows(self, queryset):
+        return queryset.select_related(None).prefetch_related(None).values(
+            *self.fields
+        )
+
+    def get_genres(self, title_ids):
+        genres = {}
+        rows = (
+            GenreTitle.objects
+            .filter(title_id__in=title_ids)
+            .order_by('genre_id')
+            .values_list('title_id', 'genre__name', 'genre__slug')
+        )
+        for title_id, name, slug in rows:
+            genres.setdefault(title_id, []).append(
+                OrderedDict((('name', name), ('slug', slug)))
+            )
+        return genres
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        genres = self.get_genres([row['id'] for row in rows])
+        data = []
+        for row in rows:
+            if row['category__slug'] is None:
+                category = None
+            else:
+                category = OrderedDict((
+                    ('name', row['category__name']),
+                    ('slug', row['category__slug']),
+                ))
+            count = row['rating_count']
+            data.append(OrderedDict((
+                ('id', row['id']),
+                ('name', row['name']),
+                ('year', row['year']),
+                ('description', row['description']),
+                ('genre', genres.get(row['id'], [])),
+                ('category', category),
+                ('rating', row['rating_sum'] / count if count else None),
+            )))
+        return data
 
 
 class WriteTitleSerializer(serializers.ModelSerializer):
@@ -60,17 +130,116 @@ class WriteTitleSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        category_slug = validated_data.pop('category')
-        genre_slugs = validated_data.pop('genre')
-        category = get_object_or_404(Category, slug=category_slug)
-        title = Title.objects.create(**validated_data, category=category)
-        genres = Genre.objects.filter(slug__in=genre_slugs)
-        for genre in genres:
-            title.genre.add(genre)
-            title.save()
+        genres = validated_data.pop('genre')
+        title = Title.objects.create(**validated_data)
+        title.genre.set(genres)
         return title
 
 
+class BatchTitleListSerializer(serializers.ListSerializer):
+    def slugs(self, data, field):
+        slugs = set()
+        for item in data if isinstance(data, list) else ():
+            value = item.get(field) if isinstance(item, dict) else None
+            values = value if isinstance(value, list) else [value]
+            slugs.update(slug for slug in values if isinstance(slug, str))
+        return slugs
+
+    def ids(self, data):
+        ids = set()
+        for item in data if isinstance(data, list) else ():
+            try:
+                ids.add(int(item['id']))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return ids
+
+    def to_internal_value(self, data):
+        # Слаги и изменяемые произведения всей пачки получаем заранее,
+        # по одному запросу на модель.
+        ids = self.ids(data)
+        self._context.update(
+            genres=Genre.objects.in_bulk(
+                self.slugs(data, 'genre'), field_name='slug'),
+            categories=Category.objects.in_bulk(
+                self.slugs(data, 'category'), field_name='slug'),
+            titles=Title.objects.in_bulk(ids),
+        )
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        ids = [item['id'] for item in attrs if 'id' in item]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError(
+                'Одно произведение изменяется в пачке несколько раз.'
+            )
+        return attrs
+
+    def create(self, validated_data):
+        now = timezone.now()
+        created, updated, links = [], [], []
+        for item in validated_data:
+            genres = item.pop('genre')
+            title = self.context['titles'].get(item.pop('id', None))
+            if title is None:
+                title = Title(**item)
+                created.append(title)
+            else:
+                for field, value in item.items():
+                    setattr(title, field, value)
+                title.updated_at = now
+                updated.append(title)
+            links.append((title, genres))
+        with transaction.atomic():
+            save_titles(created, updated)
+            GenreTitle.objects.filter(title__in=updated).delete()
+            GenreTitle.objects.bulk_create(
+                GenreTitle(title_id=title.pk, genre_id=genre.pk)
+                for title, genres in links
+                for genre in genres
+            )
+        bump_version(Title._meta.label)
+        return [title for title, _ in links]
+
+
+class BatchTitleSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=256)
+    year = serializers.IntegerField()
+    description = serializers.CharField(
+        required=False, allow_null=True, allow_blank=True)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    class Meta:
+        list_serializer_class = BatchTitleListSerializer
+
+    validate_year = WriteTitleSerializer.validate_year
+
+    def validate_id(self, value):
+        if value not in self.context['titles']:
+            raise serializers.ValidationError(
+                f'Произведение с id={value} не найдено.'
+            )
+        return value
+
+    def validate_genre(self, value):
+        genres = self.context['genres']
+        missing = [slug for slug in value if slug not in genres]
+        if missing:
+            raise serializers.ValidationError(
+                'Жанры не найдены: ' + ', '.join(missing)
+            )
+        return [genres[slug] for slug in dict.fromkeys(value)]
+
+    def validate_category(self, value):
+        if value not in self.context['categories']:
+            raise serializers.ValidationError(
+                f'Категория {value} не найдена.'
+            )
+        return self.context['categories'][value]
+
+
 class GetTokenSerializer(serializers.ModelSerializer):
     username = serializers.CharField(
         required=True)
@@ -134,7 +303,9 @@ class ReviewSerializer(serializers.ModelSerializer):
             return data
         author = self.context.get('request').user
         title_id = self.context.get('view').kwargs.get('title_id')
-        if Review.objects.filter(author=author, title=title_id).exists():
+        if Review.objects.filter(
+            author_id=author.pk, title_id=title_id
+        ).exists():
             raise serializers.ValidationError(
                 {'unique_error': 'You can only have one review on title.'}
             )
@@ -150,6 +321,15 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('author',)
 
 
+class ReviewThreadSerializer(ReviewSerializer):
+    comments = CommentSerializer(
+        many=True, read_only=True, source='latest_comments')
+    comments_count = serializers.IntegerField(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('comments_count', 'comments')
+
+
 class UsersSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
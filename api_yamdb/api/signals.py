@@ -0,0 +1,68 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+from .authentication import forget_user, revoke_tokens
+from .cache import bump_version
+
+# Поля из claims токена, изменение которых отзывает выданные токены.
+REVOKING_FIELDS = ('role', 'is_active', 'is_staff')
+
+
+def bump_on_commit(label, using):
+    # Версия меняется только после фиксации транзакции: иначе читатель
+    # мог бы закешировать старые строки уже под новой версией.
+    transaction.on_commit(lambda: bump_version(label), using=using)
+
+
+def bump_catalog_version(sender, using, **kwargs):
+    bump_on_commit(sender._meta.label, using)
+
+
+def bump_title_genre_version(sender, action, using, **kwargs):
+    if action.startswith('post_'):
+        bump_on_commit(Title._meta.label, using)
+
+
+for model in (Category, Genre, Title, Review):
+    post_save.connect(bump_catalog_version, sender=model)
+    post_delete.connect(bump_catalog_version, sender=model)
+m2m_changed.connect(bump_title_genre_version, sender=Title.genre.through)
+
+
+def remember_user_claims(sender, instance, using, update_fields, **kwargs):
+    instance._revoke_tokens = False
+    if instance.pk is None:
+        return
+    if update_fields is not None and not set(REVOKING_FIELDS) & set(
+        update_fields
+    ):
+        return
+    previous = User.objects.using(using).filter(
+        pk=instance.pk
+    ).values(*REVOKING_FIELDS).first()
+    instance._revoke_tokens = previous is not None and any(
+        previous[field] != getattr(instance, field)
+        for field in REVOKING_FIELDS
+    )
+
+
+def revoke_changed_user(sender, instance, using, **kwargs):
+    # Смена роли, блокировка (is_active=False) и снятие прав отзывают
+    # токены; кеш пользователя сбрасывается при любом изменении.
+    if instance.__dict__.pop('_revoke_tokens', False):
+        revoke_tokens(instance, using)
+    transaction.on_commit(partial(forget_user, instance.pk), using=using)
+
+
+def forget_deleted_user(sender, instance, using, **kwargs):
+    transaction.on_commit(partial(forget_user, instance.pk), using=using)
+
+
+pre_save.connect(remember_user_claims, sender=User)
+post_save.connect(revoke_changed_user, sender=User)
+post_delete.connect(forget_deleted_user, sender=User)
@@ -0,0 +1,110 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from api_yamdb.metrics import counter_totals, registry
+
+BUCKET_KEY = 'throttle-bucket:{}:{}'
+LOCK_KEY = 'throttle-lock:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Блокировка ведра: add атомарен в memcached и redis, поэтому чтение
+# и запись состояния выполняет только один запрос за раз. Таймаут
+# снимает блокировку, если воркер упал, не освободив её.
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 20
+LOCK_DELAY = 0.005
+
+
+def get_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+def parse_rate(rate):
+    # Формат как у DRF: '5/min' — ведро на 5 запросов, которое
+    # полностью наполняется за минуту.
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def acquire_lock(cache, key):
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(key, 1, LOCK_TIMEOUT):
+            return True
+        time.sleep(LOCK_DELAY)
+    return False
+
+
+def get_stats():
+    totals = counter_totals('yamdb_throttle_rejections_total', 'scope')
+    return {
+        scope: totals.get(scope, 0) for scope in settings.AUTH_THROTTLE_RATES
+    }
+
+
+class TokenBucketThrottle(BaseThrottle):
+    # Состояние ведра лежит в общем кеше, чтобы его видели все воркеры.
+    # Чтение и запись выполняются под блокировкой, иначе одновременные
+    # запросы видят одно и то же число токенов и проходят все сразу.
+    kind = None
+
+    def get_ident_value(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        value = self.get_ident_value(request)
+        if not value:
+            return True
+        self.scope = f'{view.throttle_scope}_{self.kind}'
+        capacity, period = parse_rate(settings.AUTH_THROTTLE_RATES[self.scope])
+        ident = hashlib.md5(str(value).encode()).hexdigest()
+        key = BUCKET_KEY.format(self.scope, ident)
+        cache = get_cache()
+        lock = LOCK_KEY.format(key)
+        if not acquire_lock(cache, lock):
+            # Ведро так долго занято только при всплеске запросов
+            # с одного адреса или имени.
+            return self.reject(LOCK_TIMEOUT)
+        try:
+            return self.take_token(cache, key, capacity, period)
+        finally:
+            cache.delete(lock)
+
+    def take_token(self, cache, key, capacity, period):
+        refill = capacity / period
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            return self.reject((1 - tokens) / refill)
+        # За period ведро наполняется целиком, дольше хранить его незачем.
+        cache.set(key, (tokens - 1, now), math.ceil(period))
+        return True
+
+    def reject(self, wait_time):
+        self.wait_time = wait_time
+        registry.inc('yamdb_throttle_rejections_total', {'scope': self.scope})
+        return False
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    kind = 'username'
+
+    def get_ident_value(self, request):
+        username = request.data.get('username')
+        if isinstance(username, str):
+            return username.lower()
+        return None
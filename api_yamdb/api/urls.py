@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet, GetToken,
-                    ReviewViewSet, SignUp, TitleViewSet, UsersViewSet)
+from .async_views import async_read_urls
+from .views import (CatalogCacheStats, CategoryViewSet, CommentViewSet,
+                    DatabaseConnectionStats, ExportTable, GenreViewSet,
+                    GetToken, ReviewViewSet, SignUp, SlowQueries,
+                    ThrottleStats, TitleViewSet, UsersViewSet)
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
@@ -22,5 +26,28 @@ router.register('users', UsersViewSet, basename='users')
 urlpatterns = [
     path('v1/auth/signup/', SignUp.as_view(), name='signup'),
     path('v1/auth/token/', GetToken.as_view(), name='login'),
-    path('v1/', include(router.urls)),
+    path(
+        'v1/catalog-cache/',
+        CatalogCacheStats.as_view(),
+        name='catalog-cache'
+    ),
+    path(
+        'v1/auth/throttle-stats/',
+        ThrottleStats.as_view(),
+        name='throttle-stats'
+    ),
+    path(
+        'v1/db-connections/',
+        DatabaseConnectionStats.as_view(),
+        name='db-connections'
+    ),
+    path('v1/slow-queries/', SlowQueries.as_view(), name='slow-queries'),
+    path('v1/export/<str:table>/', ExportTable.as_view(), name='export'),
+    path(
+        'v1/',
+        include(
+            async_read_urls(router.urls) if settings.ASYNC_READ_VIEWS
+            else router.urls
+        )
+    ),
 ]
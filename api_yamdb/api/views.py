@@ -1,57 +1,206 @@
+import json
+
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import (Count, IntegerField, Max, OuterRef, Prefetch,
+                              Subquery)
+from django.db.models.functions import Coalesce
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
+from rest_framework.renderers import BaseRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from reviews.models import Category, Comment, Genre, Review, Title
 from users.models import User
+from users.outbox import enqueue_email
+
+from api_yamdb import dbconnections, metrics, slowqueries
+from api_yamdb.csvdata import CSV_FILES_BY_SLUG, export_rows
 
+from . import cache, throttling
+from .authentication import get_full_user, get_token_for_user, load_user
 from .filters import TitleFilter
+from .pagination import PageNumberOrCursorPagination
 from .permissions import AdminOrReadOnly, AdminUser, IsAdminOrModeratorOrOwner
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, GetTokenSerializer,
+from .serializers import (BatchTitleSerializer, CategorySerializer,
+                          CommentSerializer, GenreSerializer,
+                          GetTokenSerializer, ReadTitleRowSerializer,
                           ReadTitleSerializer, ReviewSerializer,
-                          SignUpSerializer, UsersSerializer,
-                          WriteTitleSerializer)
-from .viewsets import CreateListDestroyViewSet
+                          ReviewThreadSerializer, SignUpSerializer,
+                          UsersSerializer, WriteTitleSerializer)
+from .throttling import IPThrottle, UsernameThrottle
+from .viewsets import (CachedListMixin, CachedRetrieveMixin,
+                       ConditionalListMixin, ConditionalRetrieveMixin,
+                       CreateListDestroyViewSet, RowListMixin,
+                       StreamingListMixin)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(StreamingListMixin, ConditionalRetrieveMixin,
+                   CachedListMixin, CachedRetrieveMixin, RowListMixin,
+                   viewsets.ModelViewSet):
+    queryset = (
+        Title.objects
+        .select_related('category')
+        .prefetch_related(
+            Prefetch('genre', queryset=Genre.objects.order_by('id'))
+        )
+        .order_by('id')
+    )
+    row_serializer_class = ReadTitleRowSerializer
     permission_classes = [AdminOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitleFilter
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('id',)
+    # get_last_modified ищет произведение по pk до get_object_or_404.
+    lookup_value_regex = '[0-9]+'
+    cache_models = (
+        'reviews.Title', 'reviews.Genre', 'reviews.Category', 'reviews.Review'
+    )
 
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
             return WriteTitleSerializer
         return ReadTitleSerializer
 
+    def get_last_modified(self):
+        return Title.objects.filter(
+            pk=self.kwargs.get('pk')
+        ).values_list('updated_at', flat=True).first()
 
-class CategoryViewSet(CreateListDestroyViewSet):
+    @action(methods=['POST'], detail=False, url_path='batch')
+    def batch(self, request):
+        serializer = BatchTitleSerializer(
+            data=request.data,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        titles = serializer.save()
+        queryset = self.get_queryset().filter(
+            pk__in=[title.pk for title in titles]
+        )
+        return Response(
+            ReadTitleSerializer(queryset, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class CategoryViewSet(CachedListMixin, CreateListDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = ('reviews.Category',)
     permission_classes = [AdminOrReadOnly]
     lookup_field = 'slug'
     filter_backends = [SearchFilter]
     search_fields = ['name']
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(CachedListMixin, CreateListDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = ('reviews.Genre',)
     permission_classes = [AdminOrReadOnly]
     lookup_field = 'slug'
     filter_backends = [SearchFilter]
     search_fields = ['name']
 
 
+class CatalogCacheStats(APIView):
+    permission_classes = (permissions.IsAuthenticated, AdminUser)
+
+    def get(self, request):
+        return Response(cache.get_stats())
+
+
+class DatabaseConnectionStats(APIView):
+    permission_classes = (permissions.IsAuthenticated, AdminUser)
+
+    def get(self, request):
+        return Response(dbconnections.stats.snapshot())
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+
+class Metrics(APIView):
+    permission_classes = (permissions.IsAuthenticated, AdminUser)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        response = Response(metrics.render())
+        response['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+        return response
+
+
+class SlowQueries(APIView):
+    permission_classes = (permissions.IsAuthenticated, AdminUser)
+
+    def get(self, request):
+        entries = slowqueries.log.snapshot()
+        output = request.query_params.get('output', 'json')
+        if output == 'json':
+            return Response(entries)
+        if output != 'ndjson':
+            raise Http404
+        response = StreamingHttpResponse(
+            slowqueries.export_entries(entries),
+            content_type='application/x-ndjson; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="slow-queries.ndjson"'
+        )
+        return response
+
+    def delete(self, request):
+        slowqueries.log.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ThrottleStats(APIView):
+    permission_classes = (permissions.IsAuthenticated, AdminUser)
+
+    def get(self, request):
+        return Response(throttling.get_stats())
+
+
+class ExportTable(APIView):
+    permission_classes = (permissions.IsAuthenticated, AdminUser)
+    content_types = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson; charset=utf-8',
+    }
+
+    def get(self, request, table):
+        csv_file = CSV_FILES_BY_SLUG.get(table)
+        output = request.query_params.get('output', 'csv')
+        if csv_file is None or output not in self.content_types:
+            raise Http404
+        response = StreamingHttpResponse(
+            export_rows(csv_file, output),
+            content_type=self.content_types[output]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{table}.{output}"'
+        )
+        return response
+
+
 class GetToken(APIView):
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = GetTokenSerializer(data=request.data)
@@ -61,7 +210,7 @@ class GetToken(APIView):
         if default_token_generator.check_token(
                 user, data.get('confirmation_code')
         ):
-            token = RefreshToken.for_user(user).access_token
+            token = get_token_for_user(user)
             return Response({'token': str(token)},
                             status=status.HTTP_201_CREATED)
         return Response(
@@ -70,7 +219,10 @@ class GetToken(APIView):
 
 
 class SignUp(APIView):
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'signup'
 
+    @transaction.atomic
     def post(self, request):
         username = request.data.get('username')
         email = request.data.get('email')
@@ -91,17 +243,27 @@ class SignUp(APIView):
             f'Добрый день, {user.username}.\n'
             f'Ваш код подтверждения: {confirmation_code}'
         )
-        send_mail(
+        # Письмо отправит команда sendemails, запрос не ждёт почтовый сервер.
+        enqueue_email(
             'Код подтверждения для доступа к API!',
-            message=email_body,
-            from_email='admin@example.com',
-            recipient_list=[user.email],
-            fail_silently=False
+            email_body,
+            user.email,
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class PatchDelAdminModeratorOwnerViewSet(viewsets.ModelViewSet):
+def get_parent_value(queryset, field):
+    # Отметка изменения родителя заодно проверяет, что он существует.
+    value = queryset.values_list(field, flat=True).first()
+    if value is None:
+        raise Http404
+    return value
+
+
+class PatchDelAdminModeratorOwnerViewSet(StreamingListMixin,
+                                         ConditionalListMixin,
+                                         ConditionalRetrieveMixin,
+                                         viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action in ["partial_update", "destroy"]:
             return [
@@ -114,34 +276,115 @@ class PatchDelAdminModeratorOwnerViewSet(viewsets.ModelViewSet):
 class ReviewViewSet(PatchDelAdminModeratorOwnerViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('-pub_date', '-id')
+    thread_comments = 3
+    max_thread_comments = 20
+
+    def include_comments(self):
+        return (
+            self.request.method in permissions.SAFE_METHODS
+            and 'comments' in self.request.query_params.get(
+                'include', '').split(',')
+        )
+
+    def get_comments_limit(self):
+        try:
+            limit = int(self.request.query_params['comments_limit'])
+        except (KeyError, ValueError):
+            return self.thread_comments
+        return min(max(limit, 1), self.max_thread_comments)
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        return title.reviews.all()
+        queryset = Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
+        if not self.include_comments():
+            return queryset
+        # Последние комментарии всех отзывов страницы выбираются одним
+        # запросом: для каждого отзыва коррелированный подзапрос по индексу
+        # (review, pub_date, id) возвращает id его последних комментариев.
+        latest = Comment.objects.filter(
+            review_id=OuterRef('review_id')
+        ).order_by('-pub_date', '-id').values('id')
+        comments = Comment.objects.filter(
+            id__in=Subquery(latest[:self.get_comments_limit()])
+        ).select_related('author').order_by('-pub_date', '-id')
+        count = Comment.objects.filter(
+            review_id=OuterRef('pk')
+        ).order_by().values('review_id').annotate(
+            count=Count('id')
+        ).values('count')
+        return queryset.annotate(
+            comments_count=Coalesce(
+                Subquery(count, output_field=IntegerField()), 0
+            )
+        ).prefetch_related(
+            Prefetch('comments', queryset=comments, to_attr='latest_comments')
+        )
+
+    def get_serializer_class(self):
+        if self.include_comments():
+            return ReviewThreadSerializer
+        return ReviewSerializer
+
+    def get_last_modified(self):
+        titles = Title.objects.filter(pk=self.kwargs.get('title_id'))
+        if not self.include_comments():
+            return get_parent_value(titles, 'reviews_updated_at')
+        values = titles.annotate(
+            comments_updated_at=Max('reviews__comments_updated_at')
+        ).values_list('reviews_updated_at', 'comments_updated_at').first()
+        if values is None:
+            raise Http404
+        return max(value for value in values if value is not None)
+
+    def check_parent(self):
+        if not Title.objects.filter(pk=self.kwargs.get('title_id')).exists():
+            raise Http404
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        serializer.save(author=self.request.user, title=title)
+        self.check_parent()
+        serializer.save(
+            author=get_full_user(self.request.user),
+            title_id=self.kwargs.get('title_id')
+        )
 
 
 class CommentViewSet(PatchDelAdminModeratorOwnerViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    pagination_class = PageNumberOrCursorPagination
+    cursor_ordering = ('-pub_date', '-id')
+
+    def get_reviews(self):
+        return Review.objects.filter(
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        )
 
     def get_queryset(self):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, pk=review_id)
-        return review.comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        ).select_related('author')
+
+    def get_last_modified(self):
+        return get_parent_value(self.get_reviews(), 'comments_updated_at')
+
+    def check_parent(self):
+        if not self.get_reviews().exists():
+            raise Http404
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, pk=review_id)
-        serializer.save(author=self.request.user, review=review)
+        self.check_parent()
+        serializer.save(
+            author=get_full_user(self.request.user),
+            review_id=self.kwargs.get('review_id')
+        )
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UsersSerializer
     permission_classes = (permissions.IsAuthenticated, AdminUser)
@@ -156,11 +399,13 @@ class UsersViewSet(viewsets.ModelViewSet):
         permission_classes=(permissions.IsAuthenticated,),
         url_path='me')
     def user_info(self, request):
+        if request.method == 'GET':
+            return Response(UsersSerializer(load_user(request.user.pk)).data)
         data = request.data.copy()
         if 'role' in data:
             data.pop('role')
         serializer = UsersSerializer(
-            request.user,
+            load_user(request.user.pk),
             data=data,
             partial=True
         )
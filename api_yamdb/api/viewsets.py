@@ -1,4 +1,16 @@
-from rest_framework import mixins, viewsets
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api_yamdb.routers import use_primary
+
+from . import cache
+from .permissions import AdminUser
 
 
 class CreateListDestroyViewSet(
@@ -8,3 +20,163 @@ class CreateListDestroyViewSet(
     viewsets.GenericViewSet
 ):
     pass
+
+
+class RowListMixin:
+    # Список сериализуется из строк values() классом row_serializer_class.
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.row_serializer_class()
+        rows = serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(rows))
+
+
+class StreamingListMixin:
+    # С параметром ?stream=true администратор получает весь список без
+    # пагинации. Объекты читаются пачками по stream_chunk_size, и каждая
+    # пачка сразу кодируется и отправляется клиенту, поэтому память не
+    # зависит от размера списка. Миксин должен стоять перед миксинами
+    # кеширования, которые ждут обычный Response.
+    stream_query_param = 'stream'
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_query_param) != 'true':
+            return super().list(request, *args, **kwargs)
+        if not (
+            permissions.IsAuthenticated().has_permission(request, self)
+            and AdminUser().has_permission(request, self)
+        ):
+            self.permission_denied(request)
+        # Ошибки (например, 404 для несуществующего родителя) нужно
+        # вернуть до начала потока, пока статус ещё можно выбрать.
+        self.check_parent()
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            self.stream_json(queryset), content_type='application/json'
+        )
+
+    def check_parent(self):
+        # Вложенные списки проверяют, что родительский объект существует.
+        pass
+
+    def get_chunk_data(self, queryset, pks):
+        row_serializer_class = getattr(self, 'row_serializer_class', None)
+        if row_serializer_class is not None:
+            serializer = row_serializer_class()
+            rows = {
+                row['id']: row
+                for row in serializer.get_rows(queryset.filter(pk__in=pks))
+            }
+            return serializer.to_representation(
+                [rows[pk] for pk in pks if pk in rows]
+            )
+        objects = queryset.in_bulk(pks)
+        return self.get_serializer(
+            [objects[pk] for pk in pks if pk in objects], many=True
+        ).data
+
+    def stream_json(self, queryset):
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        # Сначала итератором идут только первичные ключи в порядке списка,
+        # объекты каждой пачки выбираются отдельным запросом вместе с
+        # prefetch_related.
+        pks = (
+            queryset.prefetch_related(None)
+            .values_list('pk', flat=True)
+            .iterator(chunk_size=self.stream_chunk_size)
+        )
+        renderer = JSONRenderer()
+        separator = b'['
+        while True:
+            chunk = list(islice(pks, self.stream_chunk_size))
+            if not chunk:
+                break
+            data = self.get_chunk_data(queryset, chunk)
+            if data:
+                yield separator + renderer.render(data)[1:-1]
+                separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+
+class VersionedCacheMixin:
+    # Метки моделей, при изменении которых ответ становится устаревшим.
+    cache_models = ()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = cache.make_response_key(request, self.cache_models)
+        data = cache.get_response(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        # Ответ попадёт в кеш под текущей версией, поэтому строится по
+        # основной базе: данные отстающей реплики остались бы в кеше
+        # до следующего изменения.
+        use_primary()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set_response(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(VersionedCacheMixin):
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(VersionedCacheMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    # ETag и Last-Modified строятся по отметке времени изменения ресурса,
+    # без сериализации ответа.
+    def get_last_modified(self):
+        raise NotImplementedError
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        last_modified = self.get_last_modified()
+        if last_modified is None:
+            return handler(request, *args, **kwargs)
+        timestamp = int(last_modified.timestamp())
+        etag = quote_etag('{}-{}'.format(
+            request.accepted_renderer.format,
+            int(last_modified.timestamp() * 1000000)
+        ))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
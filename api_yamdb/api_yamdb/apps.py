@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class ApiYamdbConfig(AppConfig):
+    name = 'api_yamdb'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import checks  # noqa: F401
+        from . import dbconnections, slowqueries, timing
+        dbconnections.install()
+        connection_created.connect(timing.install_query_timing)
+        connection_created.connect(slowqueries.install_slow_query_log)
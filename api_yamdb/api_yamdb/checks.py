@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def shared_cache_settings():
+    # Кеши, состояние которых должно быть общим для всех воркеров.
+    names = ['THROTTLE_CACHE_ALIAS', 'TOKEN_VERSION_CACHE_ALIAS']
+    if settings.DATABASE_REPLICAS:
+        # Следующий запрос пользователя может попасть в другой воркер,
+        # и закрепление за основной базой должно быть видно и там.
+        names.append('READ_YOUR_WRITES_CACHE_ALIAS')
+    return names
+
+
+def is_process_local(alias):
+    return isinstance(caches[alias], PROCESS_LOCAL_CACHES)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    # С SHARED_CACHE_REQUIRED=True (так запускается infra) локальный кеш
+    # процесса — ошибка, и gunicorn не стартует.
+    if settings.SHARED_CACHE_REQUIRED:
+        level, check_id = Error, 'api_yamdb.E001'
+    else:
+        level, check_id = Warning, 'api_yamdb.W001'
+    return [
+        level(
+            f'{name} = {getattr(settings, name)!r} uses a process-local '
+            'cache backend, so its state is not shared between workers.',
+            hint='Set CACHE_BACKEND to a memcached or redis backend.',
+            id=check_id,
+        )
+        for name in shared_cache_settings()
+        if is_process_local(getattr(settings, name))
+    ]
@@ -0,0 +1,435 @@
+import csv
+import hashlib
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+
+from api.cache import bump_version
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from reviews.models import (Category, Comment, CsvImportState, Genre, Review,
+                            Title)
+from reviews.rating import rebuild_ratings
+from reviews.search import rebuild_search_index
+from reviews.signals import touch
+from users.models import User
+
+GenreTitle = Title.genre.through
+UPSERT_VENDORS = ('postgresql', 'sqlite')
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class CsvFile:
+    def __init__(self, name, model, columns, references=None, update=True,
+                 header=None):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.references = references or {}
+        self.update = update
+        self.header = header or columns
+
+    @property
+    def slug(self):
+        return os.path.splitext(self.name)[0]
+
+
+# Порядок файлов учитывает зависимости по внешним ключам.
+CSV_FILES = (
+    CsvFile('category.csv', Category, ('id', 'name', 'slug')),
+    CsvFile('genre.csv', Genre, ('id', 'name', 'slug')),
+    CsvFile(
+        'titles.csv', Title, ('id', 'name', 'year', 'category_id'),
+        {'category_id': Category},
+        header=('id', 'name', 'year', 'category')
+    ),
+    CsvFile(
+        'genre_title.csv', GenreTitle, ('id', 'title_id', 'genre_id'),
+        {'title_id': Title, 'genre_id': Genre}, update=False
+    ),
+    CsvFile(
+        'users.csv', User,
+        ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'),
+        update=False
+    ),
+    CsvFile(
+        'review.csv', Review,
+        ('id', 'title_id', 'text', 'author_id', 'score', 'pub_date'),
+        {'title_id': Title, 'author_id': User},
+        header=('id', 'title_id', 'text', 'author', 'score', 'pub_date')
+    ),
+    CsvFile(
+        'comments.csv', Comment,
+        ('id', 'review_id', 'text', 'author_id', 'pub_date'),
+        {'review_id': Review, 'author_id': User},
+        header=('id', 'review_id', 'text', 'author', 'pub_date')
+    ),
+)
+
+CSV_FILES_BY_SLUG = {csv_file.slug: csv_file for csv_file in CSV_FILES}
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def _export_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_rows(csv_file, output='csv'):
+    # Строки читаются итератором (серверным курсором в PostgreSQL)
+    # и сразу отдаются потребителю, поэтому память не растёт с таблицей.
+    rows = (
+        csv_file.model.objects
+        .order_by('id')
+        .values_list(*csv_file.columns)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    if output == 'ndjson':
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            yield encoder.encode(dict(zip(csv_file.header, row))) + '\n'
+        return
+    writer = csv.writer(Echo())
+    yield writer.writerow(csv_file.header)
+    for row in rows:
+        yield writer.writerow([_export_value(value) for value in row])
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    # bulk_create подставляет текущее время в поля auto_now_add,
+    # а при импорте нужно сохранить даты из файла. Атрибуты полей общие
+    # для процесса, поэтому прежние значения восстанавливаются при любом
+    # выходе из блока.
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    try:
+        for field in fields:
+            field.auto_now_add = False
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def chunked(ids, size=500):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def row_digest(hasher, row):
+    hasher.update(('\x1f'.join(row) + '\n').encode())
+
+
+def upsert_sql(model, fields, update_fields, rows):
+    # Нативный upsert PostgreSQL и SQLite: неизменённые строки
+    # не перезаписываются благодаря условию WHERE.
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = ', '.join(qn(field.column) for field in fields)
+    row_sql = '({})'.format(', '.join(['%s'] * len(fields)))
+    sql = 'INSERT INTO {} ({}) VALUES {}'.format(
+        table, columns, ', '.join([row_sql] * len(rows))
+    )
+    if not update_fields:
+        return sql + ' ON CONFLICT DO NOTHING'
+    distinct = (
+        'IS DISTINCT FROM' if connection.vendor == 'postgresql' else 'IS NOT'
+    )
+    assignments = ', '.join(
+        '{0} = excluded.{0}'.format(qn(field.column))
+        for field in update_fields
+    )
+    changed = ' OR '.join(
+        '{}.{} {} excluded.{}'.format(
+            table, qn(field.column), distinct, qn(field.column)
+        )
+        for field in update_fields
+    )
+    return '{} ON CONFLICT ({}) DO UPDATE SET {} WHERE {}'.format(
+        sql, qn(model._meta.pk.column), assignments, changed
+    )
+
+
+class CsvLoader:
+    def __init__(self, path, batch_size=1000, stdout=None, verbosity=1,
+                 incremental=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.verbosity = verbosity
+        self.incremental = incremental
+        self.ids = {}
+        # id строк, затронутых инкрементальной загрузкой, по моделям:
+        # производные данные пересчитываются только для них.
+        self.affected = defaultdict(set)
+
+    def write(self, message, level=1):
+        if self.stdout is not None and self.verbosity >= level:
+            self.stdout.write(message)
+
+    def known_ids(self, model):
+        if model not in self.ids:
+            self.ids[model] = set(
+                model.objects.values_list('id', flat=True).iterator()
+            )
+        return self.ids[model]
+
+    def read(self, csv_file):
+        file = os.path.join(self.path, csv_file.name)
+        with open(file, encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                values = dict(zip(csv_file.columns, row))
+                for column in csv_file.references:
+                    values[column] = values.get(column) or None
+                yield reader.line_num, row, values
+
+    def check_references(self, csv_file, line, values):
+        for column, model in csv_file.references.items():
+            value = values[column]
+            if value is not None and int(value) not in self.known_ids(model):
+                raise CommandError(
+                    f'{csv_file.name}, строка {line}: '
+                    f'нет объекта {model.__name__} с id={value}'
+                )
+
+    def flush(self, csv_file, to_create, to_update):
+        model = csv_file.model
+        if to_create:
+            model.objects.bulk_create(to_create, batch_size=self.batch_size)
+        if to_update:
+            model.objects.bulk_update(
+                to_update,
+                [column for column in csv_file.columns if column != 'id'],
+                batch_size=self.batch_size
+            )
+
+    def load_file(self, csv_file):
+        start = time.perf_counter()
+        existing = self.known_ids(csv_file.model)
+        to_create, to_update = [], []
+        loaded = 0
+        with keep_auto_now_add(csv_file.model):
+            for line, _, values in self.read(csv_file):
+                self.check_references(csv_file, line, values)
+                obj = csv_file.model(**values)
+                obj.id = int(obj.id)
+                if obj.id not in existing:
+                    to_create.append(obj)
+                elif csv_file.update:
+                    to_update.append(obj)
+                if len(to_create) + len(to_update) >= self.batch_size:
+                    loaded += len(to_create) + len(to_update)
+                    self.flush(csv_file, to_create, to_update)
+                    existing.update(obj.id for obj in to_create)
+                    to_create, to_update = [], []
+                    self.write(f'  {csv_file.name}: {loaded}', level=2)
+            loaded += len(to_create) + len(to_update)
+            self.flush(csv_file, to_create, to_update)
+            existing.update(obj.id for obj in to_create)
+        elapsed = time.perf_counter() - start
+        self.write(
+            f'{csv_file.name}: {loaded} строк за {elapsed:.2f} с '
+            f'({loaded / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+        return loaded
+
+    def upsert(self, csv_file, objs):
+        model = csv_file.model
+        if connection.vendor not in UPSERT_VENDORS:
+            existing = self.known_ids(model)
+            self.flush(
+                csv_file,
+                [obj for obj in objs if obj.id not in existing],
+                [obj for obj in objs if obj.id in existing and csv_file.update]
+            )
+            return
+        fields = model._meta.concrete_fields
+        update_fields = [
+            model._meta.get_field(column) for column in csv_file.columns
+            if column != 'id'
+        ] if csv_file.update else []
+        size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+        with connection.cursor() as cursor:
+            for start in range(0, len(objs), size):
+                chunk = objs[start:start + size]
+                params = [
+                    field.get_db_prep_save(
+                        field.pre_save(obj, add=True), connection
+                    )
+                    for obj in chunk
+                    for field in fields
+                ]
+                cursor.execute(
+                    upsert_sql(model, fields, update_fields, chunk), params
+                )
+
+    def collect_affected(self, model, objs):
+        # Для перенесённых строк учитываются и прежние произведения
+        # и отзывы, поэтому они читаются до upsert.
+        ids = [obj.id for obj in objs]
+        if model in (Category, Genre, Title):
+            self.affected[model].update(ids)
+            return
+        parents = {
+            GenreTitle: ('title_id', Title),
+            Review: ('title_id', Title),
+            Comment: ('review_id', Review),
+        }
+        if model not in parents:
+            return
+        column, parent = parents[model]
+        self.affected[parent].update(
+            int(getattr(obj, column)) for obj in objs
+        )
+        self.affected[parent].update(
+            model.objects.filter(pk__in=ids).values_list(column, flat=True)
+        )
+
+    def commit_batch(self, csv_file, objs, line, hasher):
+        with transaction.atomic():
+            if objs:
+                self.collect_affected(csv_file.model, objs)
+                self.upsert(csv_file, objs)
+            CsvImportState.objects.update_or_create(
+                file_name=csv_file.name,
+                defaults={'rows': line - 1, 'checksum': hasher.hexdigest()}
+            )
+        self.known_ids(csv_file.model).update(obj.id for obj in objs)
+
+    def processed_rows(self, csv_file, state):
+        # Если начало файла совпадает с уже загруженным, пропускаем его
+        # и продолжаем с последнего зафиксированного пакета.
+        if state is None or not state.rows:
+            return 0
+        hasher = hashlib.sha256()
+        for line, row, _ in self.read(csv_file):
+            row_digest(hasher, row)
+            if line - 1 == state.rows:
+                if hasher.hexdigest() == state.checksum:
+                    return state.rows
+                break
+        return 0
+
+    def load_file_incremental(self, csv_file):
+        start = time.perf_counter()
+        state = CsvImportState.objects.filter(file_name=csv_file.name).first()
+        skip = self.processed_rows(csv_file, state)
+        hasher = hashlib.sha256()
+        objs = []
+        loaded = 0
+        line = 1
+        with keep_auto_now_add(csv_file.model):
+            for line, row, values in self.read(csv_file):
+                row_digest(hasher, row)
+                if line - 1 <= skip:
+                    continue
+                self.check_references(csv_file, line, values)
+                obj = csv_file.model(**values)
+                obj.id = int(obj.id)
+                objs.append(obj)
+                if len(objs) >= self.batch_size:
+                    self.commit_batch(csv_file, objs, line, hasher)
+                    loaded += len(objs)
+                    objs = []
+                    self.write(f'  {csv_file.name}: {loaded}', level=2)
+            if objs or line - 1 != skip:
+                self.commit_batch(csv_file, objs, line, hasher)
+            loaded += len(objs)
+        elapsed = time.perf_counter() - start
+        self.write(
+            f'{csv_file.name}: пропущено {skip}, обработано {loaded} строк '
+            f'за {elapsed:.2f} с '
+            f'({loaded / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+        return loaded
+
+    def reset_sequences(self):
+        models = [csv_file.model for csv_file in CSV_FILES]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def changed_titles(self, models):
+        # Произведения, у которых нужно пересчитать рейтинг и поиск,
+        # и произведения, у которых изменились только категория или жанр.
+        if not self.incremental:
+            if {Title, GenreTitle, Review} & models:
+                return [Title.objects.all()], []
+            return [], []
+        titles = [
+            Title.objects.filter(pk__in=chunk)
+            for chunk in chunked(self.affected[Title])
+        ]
+        related = [
+            Title.objects.filter(**{f'{field}__in': chunk})
+            for field, model in (('category', Category), ('genre', Genre))
+            for chunk in chunked(self.affected[model])
+        ]
+        return titles, related
+
+    def changed_reviews(self, models):
+        if not self.incremental:
+            return [Review.objects.all()] if Comment in models else []
+        return [
+            Review.objects.filter(pk__in=chunk)
+            for chunk in chunked(self.affected[Review])
+        ]
+
+    def refresh_derived(self, models):
+        # bulk_create, bulk_update и upsert не вызывают сигналы, поэтому
+        # рейтинги, поисковый индекс, отметки изменений и версии кеша
+        # обновляем здесь. Инкрементальная загрузка обновляет только
+        # затронутые строки, чтобы не сбрасывать ETag всего каталога.
+        titles, related = self.changed_titles(models)
+        for queryset in titles:
+            rebuild_ratings(queryset)
+            rebuild_search_index(
+                titles=queryset if self.incremental else None
+            )
+            touch(queryset, 'updated_at', 'reviews_updated_at')
+        for queryset in related:
+            touch(queryset, 'updated_at')
+        for queryset in self.changed_reviews(models):
+            touch(queryset, 'comments_updated_at')
+        # Версии кеша меняются после фиксации, как и в сигналах.
+        labels = [
+            model._meta.label for model in (Category, Genre, Review)
+            if model in models
+        ]
+        if titles:
+            labels.append(Title._meta.label)
+        for label in labels:
+            transaction.on_commit(partial(bump_version, label))
+
+    def load(self, csv_files=CSV_FILES):
+        load_file = (
+            self.load_file_incremental if self.incremental
+            else self.load_file
+        )
+        loaded = {
+            csv_file.model for csv_file in csv_files if load_file(csv_file)
+        }
+        with transaction.atomic():
+            self.reset_sequences()
+            self.refresh_derived(loaded)
+        return loaded
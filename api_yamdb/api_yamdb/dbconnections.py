@@ -0,0 +1,108 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core import signals
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+
+
+class ConnectionStats:
+    # Счётчики одного процесса (воркера).
+    fields = ('opened', 'reused', 'expired', 'discarded')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = dict.fromkeys(self.fields, 0)
+
+    def increment(self, field):
+        with self.lock:
+            self.counts[field] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+stats = ConnectionStats()
+
+
+def count_opened(sender, connection, **kwargs):
+    stats.increment('opened')
+
+
+def needs_health_check(connection):
+    # SELECT 1 нужен только соединению, которое простаивало дольше
+    # DB_CONN_HEALTH_CHECK_IDLE: у занятого воркера проверка на каждый
+    # запрос была бы лишним обращением к базе. Если соединение всё же
+    # оборвалось, запрос завершится ошибкой и оно закроется в конце.
+    idle_since = getattr(connection, 'idle_since', None)
+    return (
+        idle_since is None
+        or time.monotonic() - idle_since >= settings.DB_CONN_HEALTH_CHECK_IDLE
+    )
+
+
+def recycle(connection, health_check=False):
+    # То же, что close_if_unusable_or_obsolete, но с проверкой соединения
+    # перед повторным использованием (в Django 3.2 её нет) и с учётом
+    # причины закрытия.
+    if connection.get_autocommit() != connection.settings_dict['AUTOCOMMIT']:
+        connection.close()
+        return 'discarded'
+    checked = False
+    if connection.errors_occurred:
+        if not connection.is_usable():
+            connection.close()
+            return 'discarded'
+        connection.errors_occurred = False
+        checked = True
+    if (
+        connection.close_at is not None
+        and time.monotonic() >= connection.close_at
+    ):
+        connection.close()
+        return 'expired'
+    if not health_check:
+        # Конец запроса: с этого момента соединение простаивает.
+        connection.idle_since = time.monotonic()
+        return None
+    if (
+        settings.DB_CONN_HEALTH_CHECKS and not checked
+        and needs_health_check(connection)
+        and not connection.is_usable()
+    ):
+        connection.close()
+        return 'discarded'
+    return 'reused'
+
+
+def recycle_connections(health_check=False):
+    for connection in connections.all():
+        # Соединение внутри транзакции (например, в тестах) не трогаем.
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        result = recycle(connection, health_check)
+        if result is not None:
+            stats.increment(result)
+
+
+def on_request_started(**kwargs):
+    recycle_connections(health_check=True)
+
+
+def on_request_finished(**kwargs):
+    recycle_connections()
+
+
+def install():
+    # Заменяет стандартный close_old_connections на сигналах запроса.
+    signals.request_started.disconnect(close_old_connections)
+    signals.request_finished.disconnect(close_old_connections)
+    signals.request_started.connect(on_request_started)
+    signals.request_finished.connect(on_request_finished)
+    connection_created.connect(count_opened)
@@ -0,0 +1,55 @@
+import time
+
+from django.core import signals
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api_yamdb.dbconnections import stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время запроса с новым соединением для каждого запроса '
+        'и с постоянным соединением, проверяемым перед использованием.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--max-age', type=int, default=600)
+
+    def handle(self, *args, **options):
+        max_age = connection.settings_dict['CONN_MAX_AGE']
+        try:
+            for name, age in (
+                ('новое соединение', 0),
+                ('постоянное соединение', options['max_age']),
+            ):
+                connection.settings_dict['CONN_MAX_AGE'] = age
+                connection.close()
+                stats.reset()
+                self.report(name, self.run(options['requests']))
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = max_age
+            connection.close()
+
+    def run(self, requests):
+        # Каждый цикл повторяет жизнь запроса: сигналы начала и конца
+        # запроса и один простой запрос к базе.
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            signals.request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            signals.request_finished.send(sender=self.__class__)
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)
+
+    def report(self, name, timings):
+        average = sum(timings) / len(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f'среднее: {average * 1000:.3f} мс, p99: {p99 * 1000:.3f} мс, '
+            f'счётчики: {stats.snapshot()}'
+        )
@@ -0,0 +1,113 @@
+import random
+import time
+
+from api.filters import TitleFilter
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.http import QueryDict
+from reviews.models import Category, Genre, Title
+
+GenreTitle = Title.genre.through
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает планы и время старых (icontains) и новых фильтров '
+        'произведений на сгенерированном каталоге. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=100000)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            genres = list(Genre.objects.values_list('slug', flat=True)[:2])
+            category = Category.objects.values_list('slug', flat=True)[0]
+            cases = (
+                (
+                    f'genre={genres[0]}',
+                    Title.objects.filter(
+                        genre__slug__icontains=genres[0]),
+                    f'genre={genres[0]}',
+                ),
+                (
+                    f'category={category}',
+                    Title.objects.filter(
+                        category__slug__icontains=category),
+                    f'category={category}',
+                ),
+                (
+                    f'genre={",".join(genres)}&genre_mode=all',
+                    Title.objects.filter(genre__slug__icontains=genres[0])
+                    .filter(genre__slug__icontains=genres[1]),
+                    f'genre={",".join(genres)}&genre_mode=all',
+                ),
+            )
+            for name, old, query in cases:
+                new = TitleFilter(
+                    QueryDict(query), queryset=Title.objects.all()
+                ).qs
+                self.report(name, 'icontains', old, options['repeat'])
+                self.report(name, 'TitleFilter', new, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        start = time.perf_counter()
+        first_id = (Title.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        Category.objects.bulk_create(
+            Category(name=f'bench {i}', slug=f'bench-category-{i}')
+            for i in range(options['categories'])
+        )
+        Genre.objects.bulk_create(
+            Genre(name=f'bench {i}', slug=f'bench-genre-{i}')
+            for i in range(options['genres'])
+        )
+        category_ids = list(Category.objects.filter(
+            slug__startswith='bench-category-'
+        ).values_list('id', flat=True))
+        genre_ids = list(Genre.objects.filter(
+            slug__startswith='bench-genre-'
+        ).values_list('id', flat=True))
+        title_ids = range(first_id, first_id + options['titles'])
+        Title.objects.bulk_create(
+            (
+                Title(
+                    id=title_id, name=f'bench {title_id}',
+                    year=random.randint(1900, 2023),
+                    category_id=random.choice(category_ids)
+                )
+                for title_id in title_ids
+            ),
+            batch_size=5000
+        )
+        GenreTitle.objects.bulk_create(
+            (
+                GenreTitle(title_id=title_id, genre_id=genre_id)
+                for title_id in title_ids
+                for genre_id in random.sample(genre_ids, 3)
+            ),
+            batch_size=5000
+        )
+        self.stdout.write(
+            f'Каталог из {options["titles"]} произведений создан за '
+            f'{time.perf_counter() - start:.1f} с'
+        )
+
+    def report(self, name, kind, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.values_list('id', flat=True)[:5])
+            queryset.count()
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name} — {kind}'))
+        self.stdout.write(
+            f'строк: {queryset.count()}, лучшее время страницы: '
+            f'{min(timings) * 1000:.1f} мс'
+        )
+        self.stdout.write(queryset.explain())
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер GET-запросами и выводит пропускную '
+        'способность и перцентили времени ответа. Используется для '
+        'сравнения WSGI- и ASGI-профилей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+')
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        for url in options['urls']:
+            self.bench(url, options)
+
+    def fetch(self, url, timeout):
+        start = time.perf_counter()
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                response.read()
+                ok = response.status == 200
+        except (URLError, OSError):
+            ok = False
+        return time.perf_counter() - start, ok
+
+    def bench(self, url, options):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(
+                lambda _: self.fetch(url, options['timeout']),
+                range(options['requests'])
+            ))
+        elapsed = time.perf_counter() - start
+        timings = sorted(timing for timing, _ in results)
+        errors = sum(1 for _, ok in results if not ok)
+
+        def percentile(value):
+            index = min(len(timings) - 1, int(len(timings) * value))
+            return timings[index] * 1000
+
+        self.stdout.write(self.style.MIGRATE_HEADING(url))
+        self.stdout.write(
+            f'запросов: {len(results)}, ошибок: {errors}, '
+            f'в секунду: {len(results) / elapsed:.0f}, '
+            f'p50: {percentile(0.5):.1f} мс, '
+            f'p99: {percentile(0.99):.1f} мс'
+        )
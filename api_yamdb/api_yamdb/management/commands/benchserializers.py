@@ -0,0 +1,56 @@
+import time
+
+from api.serializers import ReadTitleRowSerializer, ReadTitleSerializer
+from api.views import TitleViewSet
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from .benchfilters import Command as BenchFiltersCommand
+
+
+class Command(BenchFiltersCommand):
+    help = (
+        'Сравнивает скорость ReadTitleSerializer и ReadTitleRowSerializer '
+        'на сгенерированном каталоге. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Сколько произведений сериализовать за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            queryset = TitleViewSet.queryset.all()[:options['rows']]
+            self.measure(
+                'ReadTitleSerializer',
+                lambda: ReadTitleSerializer(queryset.all(), many=True).data,
+                options
+            )
+            row_serializer = ReadTitleRowSerializer()
+            self.measure(
+                'ReadTitleRowSerializer',
+                lambda: row_serializer.to_representation(
+                    row_serializer.get_rows(queryset.all())
+                ),
+                options
+            )
+            transaction.set_rollback(True)
+
+    def measure(self, name, serialize, options):
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            JSONRenderer().render(serialize())
+            timings.append(time.perf_counter() - start)
+        rows = min(options['rows'], options['titles'])
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f'лучшее время: {min(timings) * 1000:.1f} мс, '
+            f'строк в секунду: {rows / min(timings):.0f}'
+        )
@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_yamdb.csvdata import CSV_FILES, CSV_FILES_BY_SLUG, export_rows
+
+EXTENSIONS = {'csv': '.csv', 'ndjson': '.ndjson'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает таблицы в формате, который читает importcsv, '
+        'или в NDJSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables',
+            nargs='*',
+            help=(
+                'Таблицы для выгрузки: '
+                + ', '.join(CSV_FILES_BY_SLUG) + '. По умолчанию все.'
+            )
+        )
+        parser.add_argument(
+            '--output',
+            default='.',
+            help='Каталог для файлов выгрузки.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=tuple(EXTENSIONS),
+            default='csv',
+            dest='output_format'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['tables']) - set(CSV_FILES_BY_SLUG)
+        if unknown:
+            raise CommandError(
+                'Неизвестные таблицы: ' + ', '.join(sorted(unknown))
+            )
+        csv_files = [
+            CSV_FILES_BY_SLUG[table] for table in options['tables']
+        ] or CSV_FILES
+        os.makedirs(options['output'], exist_ok=True)
+        for csv_file in csv_files:
+            start = time.perf_counter()
+            file = os.path.join(
+                options['output'],
+                csv_file.slug + EXTENSIONS[options['output_format']]
+            )
+            lines = 0
+            with open(file, 'w', encoding='utf-8', newline='') as f:
+                for chunk in export_rows(csv_file, options['output_format']):
+                    f.write(chunk)
+                    lines += 1
+            self.stdout.write(
+                f'{file}: {lines} строк за '
+                f'{time.perf_counter() - start:.2f} с'
+            )
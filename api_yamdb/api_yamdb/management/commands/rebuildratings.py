@@ -0,0 +1,38 @@
+from functools import partial
+
+from api.cache import bump_version
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews.models import Title
+from reviews.rating import find_rating_mismatches, rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и проверяет рейтинги произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить рейтинги, ничего не изменяя.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                updated = rebuild_ratings()
+                # update() не отправляет сигналы: закешированные ответы
+                # каталога с неверным рейтингом сбрасываются явно.
+                transaction.on_commit(
+                    partial(bump_version, Title._meta.label)
+                )
+            self.stdout.write(f'Пересчитано произведений: {updated}')
+        mismatches = list(
+            find_rating_mismatches().values_list('pk', flat=True)
+        )
+        if mismatches:
+            raise CommandError(
+                'Рейтинг не совпадает с отзывами у произведений: '
+                + ', '.join(map(str, mismatches))
+            )
+        self.stdout.write(self.style.SUCCESS('Рейтинги совпадают с отзывами.'))
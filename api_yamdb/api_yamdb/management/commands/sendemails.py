@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from users.outbox import DeliveryStats, deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.OUTBOX_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новые письма.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.OUTBOX_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+
+    def handle(self, *args, **options):
+        total = DeliveryStats()
+        while True:
+            try:
+                stats = deliver_batch(options['batch_size'])
+            except Exception as error:
+                # В режиме --loop сбой (например, недоступная база) не
+                # останавливает отправку: повторяем после паузы.
+                if not options['loop']:
+                    raise
+                self.stderr.write(f'Ошибка отправки: {error}')
+                time.sleep(options['interval'])
+                continue
+            if stats:
+                self.report(stats)
+                total.update(stats)
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Отправлено: {total.sent}, ошибок: {total.failed}'
+        ))
+
+    def report(self, stats):
+        if stats.latencies:
+            latency = (
+                f', задержка средняя {stats.avg_latency.total_seconds():.3f} с'
+                f', максимальная {stats.max_latency.total_seconds():.3f} с'
+            )
+        else:
+            latency = ''
+        self.stdout.write(
+            f'Отправлено: {stats.sent}, ошибок: {stats.failed}{latency}'
+        )
@@ -0,0 +1,87 @@
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from api_yamdb.warmup import WARMUP_STEPS, warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает процесс: импортирует приложения, строит маршруты, '
+        'открывает соединения с базой и заполняет кеш каталога.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--step',
+            action='append',
+            choices=[name for name, _ in WARMUP_STEPS],
+            help='Выполнить только указанные шаги.'
+        )
+        parser.add_argument(
+            '--measure',
+            action='store_true',
+            help=(
+                'Сравнить время первых запросов в новом процессе '
+                'без прогрева и после него.'
+            )
+        )
+        parser.add_argument(
+            '--first-request',
+            choices=('cold', 'warm'),
+            help='Служебный режим для --measure.'
+        )
+
+    def handle(self, *args, **options):
+        if options['first_request']:
+            self.first_request(options['first_request'] == 'warm')
+            return
+        if options['measure']:
+            self.measure()
+            return
+        total = 0
+        for name, seconds in warm_up(options['step']):
+            total += seconds
+            self.stdout.write(f'{name}: {seconds * 1000:.1f} мс')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрев занял {total * 1000:.1f} мс'
+        ))
+
+    def first_request(self, warm):
+        if warm:
+            warm_up()
+        client = Client(HTTP_HOST=settings.WARMUP_HOST)
+        timings = {}
+        for path in settings.WARMUP_URLS:
+            start = time.perf_counter()
+            client.get(path)
+            timings[path] = time.perf_counter() - start
+        self.stdout.write(json.dumps(timings))
+
+    def run_probe(self, mode):
+        # Каждый замер — в новом процессе, как у только что запущенного
+        # воркера.
+        output = subprocess.run(
+            [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'),
+                'warmup', '--first-request', mode,
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def measure(self):
+        cold = self.run_probe('cold')
+        warm = self.run_probe('warm')
+        for path in settings.WARMUP_URLS:
+            self.stdout.write(
+                f'{path}: без прогрева {cold[path] * 1000:.1f} мс, '
+                f'после прогрева {warm[path] * 1000:.1f} мс'
+            )
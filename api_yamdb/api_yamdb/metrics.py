@@ -0,0 +1,286 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+
+from . import dbconnections
+
+# Границы корзин гистограммы времени ответа, в секундах.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+METRIC_HELP = {
+    'yamdb_http_requests_total': (
+        'counter', 'Запросы по маршруту, методу и классу статуса.'),
+    'yamdb_http_request_duration_seconds': (
+        'histogram', 'Время ответа по маршруту и методу.'),
+    'yamdb_db_queries_total': (
+        'counter', 'Запросы к базе по маршруту.'),
+    'yamdb_db_query_duration_seconds_total': (
+        'counter', 'Время запросов к базе по маршруту.'),
+    'yamdb_db_connections_total': (
+        'counter', 'События соединений с базой.'),
+    'yamdb_catalog_cache_requests_total': (
+        'counter', 'Обращения к кешу каталога.'),
+    'yamdb_catalog_cache_hit_ratio': (
+        'gauge', 'Доля попаданий в кеш каталога.'),
+    'yamdb_throttle_rejections_total': (
+        'counter', 'Отклонённые ограничением частоты запросы.'),
+}
+
+
+class Registry:
+    # Метрики одного процесса. Каждый воркер периодически сбрасывает их в
+    # свой файл в METRICS_DIR, а /metrics суммирует файлы всех воркеров.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.pid = os.getpid()
+            # Имя файла уникально для процесса, даже если pid повторится.
+            self.name = f'{self.pid}-{uuid.uuid4().hex}.json'
+            self.counters = {}
+            self.histograms = {}
+            self.flushed_at = 0
+            # Отложенная запись: поток таймера не переживает fork.
+            self.timer = None
+            self.write_lock = threading.Lock()
+
+    def check_fork(self):
+        # После fork воркер начинает с пустого реестра и своего файла.
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, labels, value=1):
+        self.check_fork()
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        self.check_fork()
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+                    'sum': 0,
+                }
+            histogram['buckets'][bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram['sum'] += value
+
+    def snapshot(self):
+        self.check_fork()
+        connection_stats = dbconnections.stats.snapshot()
+        with self.lock:
+            counters = [
+                [name, list(labels), value]
+                for (name, labels), value in self.counters.items()
+            ]
+            histograms = [
+                [name, list(labels), dict(histogram, buckets=list(
+                    histogram['buckets']))]
+                for (name, labels), histogram in self.histograms.items()
+            ]
+        counters.extend(
+            ['yamdb_db_connections_total', [['event', event]], value]
+            for event, value in connection_stats.items()
+        )
+        return {'counters': counters, 'histograms': histograms}
+
+    def flush(self, force=False):
+        self.check_fork()
+        wait = (
+            self.flushed_at + settings.METRICS_FLUSH_INTERVAL
+            - time.monotonic()
+        )
+        if not force and wait > 0:
+            # Иначе изменения последних запросов перед простоем воркера
+            # не попали бы в файл, и /metrics других воркеров их не видел.
+            self.schedule_flush(wait)
+            return
+        with self.write_lock:
+            self.flushed_at = time.monotonic()
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            path = os.path.join(settings.METRICS_DIR, self.name)
+            temporary = f'{path}.tmp'
+            with open(temporary, 'w') as file:
+                json.dump(self.snapshot(), file)
+            os.replace(temporary, path)
+
+    def schedule_flush(self, delay):
+        with self.lock:
+            if self.timer is not None:
+                return
+            self.timer = threading.Timer(delay, self.flush_pending)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush_pending(self):
+        with self.lock:
+            self.timer = None
+        self.flush(force=True)
+
+    def flush_at_exit(self):
+        if self.pid == os.getpid() and (self.counters or self.histograms):
+            self.flush(force=True)
+
+
+registry = Registry()
+atexit.register(registry.flush_at_exit)
+
+
+def clear_store():
+    # Вызывается в мастере gunicorn до запуска воркеров.
+    if not os.path.isdir(settings.METRICS_DIR):
+        return
+    for name in os.listdir(settings.METRICS_DIR):
+        os.remove(os.path.join(settings.METRICS_DIR, name))
+
+
+def read_store():
+    counters = {}
+    histograms = {}
+    for name in os.listdir(settings.METRICS_DIR):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        for metric, labels, value in data['counters']:
+            key = (metric, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for metric, labels, histogram in data['histograms']:
+            key = (metric, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, {
+                'buckets': [0] * len(histogram['buckets']), 'sum': 0
+            })
+            for index, count in enumerate(histogram['buckets']):
+                total['buckets'][index] += count
+            total['sum'] += histogram['sum']
+    return counters, histograms
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def counter_totals(metric, label):
+    # Сумма счётчика по всем воркерам в разрезе одной метки.
+    registry.flush(force=True)
+    counters, _ = read_store()
+    totals = {}
+    for (name, labels), value in counters.items():
+        if name == metric:
+            key = dict(labels).get(label)
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def default_counters():
+    # Счётчики, которые выводятся и с нулевым значением.
+    for result in ('hit', 'miss'):
+        yield 'yamdb_catalog_cache_requests_total', (('result', result),)
+    for scope in settings.AUTH_THROTTLE_RATES:
+        yield 'yamdb_throttle_rejections_total', (('scope', scope),)
+
+
+def hit_ratio(counters):
+    hits, misses = (
+        counters[('yamdb_catalog_cache_requests_total', (('result', result),))]
+        for result in ('hit', 'miss')
+    )
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def histogram_samples(metric, labels, histogram):
+    cumulative = 0
+    bounds = [*map(str, LATENCY_BUCKETS), '+Inf']
+    for bound, count in zip(bounds, histogram['buckets']):
+        cumulative += count
+        yield f'{metric}_bucket', labels + (('le', bound),), cumulative
+    yield f'{metric}_sum', labels, histogram['sum']
+    yield f'{metric}_count', labels, cumulative
+
+
+def render():
+    registry.flush(force=True)
+    counters, histograms = read_store()
+    for key in default_counters():
+        counters.setdefault(key, 0)
+    samples = {
+        'yamdb_catalog_cache_hit_ratio': [
+            ('yamdb_catalog_cache_hit_ratio', (), hit_ratio(counters))
+        ],
+    }
+    for (metric, labels), value in sorted(counters.items()):
+        samples.setdefault(metric, []).append((metric, labels, value))
+    for (metric, labels), histogram in sorted(histograms.items()):
+        samples.setdefault(metric, []).extend(
+            histogram_samples(metric, labels, histogram)
+        )
+    output = []
+    for metric in sorted(samples):
+        kind, description = METRIC_HELP[metric]
+        output.append(f'# HELP {metric} {description}')
+        output.append(f'# TYPE {metric} {kind}')
+        for name, labels, value in samples[metric]:
+            output.append(
+                f'{name}{format_labels(labels)} {format_value(value)}'
+            )
+    return '\n'.join(output) + '\n'
+
+
+class MetricsMiddleware:
+    # Должен стоять перед ServerTimingMiddleware: берёт из request.timing
+    # время ответа и число запросов к базе.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        state = getattr(request, 'timing', None)
+        if state is None or state.durations is None:
+            return response
+        match = getattr(request, 'resolver_match', None)
+        route = match.url_name if match and match.url_name else 'unmatched'
+        labels = {'route': route, 'method': request.method}
+        registry.inc('yamdb_http_requests_total', dict(
+            labels, status=f'{response.status_code // 100}xx'
+        ))
+        registry.observe(
+            'yamdb_http_request_duration_seconds',
+            labels,
+            state.durations['total']
+        )
+        registry.inc('yamdb_db_queries_total', {'route': route}, state.queries)
+        registry.inc(
+            'yamdb_db_query_duration_seconds_total',
+            {'route': route},
+            state.db_time
+        )
+        registry.flush()
+        return response
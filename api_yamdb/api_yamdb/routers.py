@@ -0,0 +1,110 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY = 'db-primary-pin:{}'
+
+routing = ContextVar('db_routing', default=None)
+
+
+def get_pin_cache():
+    return caches[settings.READ_YOUR_WRITES_CACHE_ALIAS]
+
+
+def pin_user(user_id):
+    # Пока ключ жив, чтения пользователя идут в основную базу и он видит
+    # свои изменения, даже если реплика отстаёт.
+    get_pin_cache().set(
+        PIN_KEY.format(user_id), True, settings.READ_YOUR_WRITES_WINDOW
+    )
+
+
+def is_pinned(user_id):
+    return get_pin_cache().get(PIN_KEY.format(user_id)) is not None
+
+
+def use_primary():
+    state = routing.get()
+    if state is not None:
+        state.primary = True
+
+
+class RequestRouting:
+    def __init__(self, request):
+        self.request = request
+        self.primary = request.method not in SAFE_METHODS
+        self.replica = None
+        self.user_checked = False
+
+    def get_user(self):
+        # DRF подставляет пользователя из JWT в request.user только при
+        # аутентификации; ленивого пользователя сессии не вычисляем.
+        user = self.request.__dict__.get('user')
+        if user is None or isinstance(user, SimpleLazyObject):
+            return None
+        return user
+
+    def db_for_read(self):
+        if not self.primary and not self.user_checked:
+            user = self.get_user()
+            if user is not None:
+                self.user_checked = True
+                if user.is_authenticated and is_pinned(user.pk):
+                    self.primary = True
+        if self.primary:
+            return DEFAULT_DB_ALIAS
+        if self.replica is None:
+            # Все чтения одного запроса идут в одну реплику.
+            self.replica = random.choice(settings.DATABASE_REPLICAS)
+        return self.replica
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if state is None or not settings.DATABASE_REPLICAS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.db_for_read()
+
+    def db_for_write(self, model, **hints):
+        # Объекты, прочитанные из реплики, сохраняются в основную базу.
+        instance = hints.get('instance')
+        if (
+            instance is not None
+            and instance._state.db in settings.DATABASE_REPLICAS
+        ):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    # Безопасные запросы читают из реплик, остальные работают с основной
+    # базой и на READ_YOUR_WRITES_WINDOW секунд закрепляют за ней чтения
+    # пользователя.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = routing.set(RequestRouting(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        if request.method not in SAFE_METHODS:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_user(user.pk)
+        return response
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -31,17 +32,67 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api_yamdb.metrics.MetricsMiddleware',
+    'api_yamdb.timing.ServerTimingMiddleware',
+    'api.async_views.BufferStreamingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api_yamdb.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
 
+# Заголовок Server-Timing с временем базы, view и рендеринга. Он
+# раскрывает время работы базы любому клиенту, поэтому по умолчанию
+# включён только с DEBUG.
+SERVER_TIMING_HEADER = (
+    os.getenv('SERVER_TIMING_HEADER', default=str(DEBUG)) == 'True'
+)
+# Пороги в миллисекундах по имени маршрута, после которых запрос
+# пишется в лог как медленный.
+SLOW_REQUEST_THRESHOLDS = {
+    'default': int(os.getenv('SLOW_REQUEST_THRESHOLD', default=1000)),
+    'title-list': 300,
+    'title-detail': 200,
+    'category-list': 200,
+    'genre-list': 200,
+}
+SLOW_REQUEST_SQL_LIMIT = 5
+# Журнал медленных SQL-запросов (по умолчанию выключен): запросы дольше
+# SLOW_QUERY_THRESHOLD миллисекунд попадают в кольцевой буфер процесса
+# вместе с местом вызова и планом EXPLAIN.
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', default='False') == 'True'
+SLOW_QUERY_THRESHOLD = int(os.getenv('SLOW_QUERY_THRESHOLD', default=100))
+SLOW_QUERY_LOG_SIZE = 200
+SLOW_QUERY_EXPLAIN = True
+SLOW_QUERY_STACK_DEPTH = 5
+
+# Метрики воркеров для /metrics: каждый процесс сбрасывает свои счётчики
+# в файл каталога не чаще раза в METRICS_FLUSH_INTERVAL секунд; изменения
+# между записями дописывает таймер, а при выходе — atexit.
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'yamdb-metrics')
+)
+METRICS_FLUSH_INTERVAL = 1
+
+# Прогрев процесса перед первыми запросами (команда warmup и
+# gunicorn.conf.py). Host участвует в ключах кеша каталога, поэтому
+# должен совпадать с тем, что приходит от nginx.
+WARMUP_HOST = os.getenv('WARMUP_HOST', default='web:8000')
+WARMUP_URLS = (
+    '/api/v1/titles/',
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+)
+
+# Async view для горячих эндпоинтов чтения, включается в asgi.py.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', default='False') == 'True'
+
 TEMPLATES_DIR = BASE_DIR / 'templates'
 TEMPLATES = [
     {
@@ -71,9 +122,69 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Соединение живёт между запросами воркера и проверяется перед
+        # повторным использованием (DB_CONN_HEALTH_CHECKS).
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
     }
 }
+DB_CONN_HEALTH_CHECKS = (
+    os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True'
+)
+# Проверяются только соединения, простаивавшие дольше стольких секунд.
+DB_CONN_HEALTH_CHECK_IDLE = int(
+    os.getenv('DB_CONN_HEALTH_CHECK_IDLE', default=10)
+)
+
+# Реплики для чтения: DB_REPLICA_HOSTS=replica1,replica2. Остальные
+# параметры подключения такие же, как у основной базы.
+for number, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(','))
+):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api_yamdb.routers.ReplicaRouter']
+READ_YOUR_WRITES_WINDOW = int(
+    os.getenv('READ_YOUR_WRITES_WINDOW', default=5)
+)
+# Закрепления хранятся в общем кеше (см. SHARED_CACHE_REQUIRED), чтобы
+# их видели все воркеры.
+READ_YOUR_WRITES_CACHE_ALIAS = 'default'
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+# Ограничения частоты и версии токенов должны быть общими для всех
+# воркеров: с SHARED_CACHE_REQUIRED=True локальный кеш процесса — ошибка
+# проверки при запуске (api_yamdb.checks).
+SHARED_CACHE_REQUIRED = (
+    os.getenv('SHARED_CACHE_REQUIRED', default='False') == 'True'
+)
+
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', default=3600))
+
+# Ограничение частоты запросов к регистрации и получению токена.
+THROTTLE_CACHE_ALIAS = 'default'
+AUTH_THROTTLE_RATES = {
+    'signup_ip': '20/min',
+    'signup_username': '3/min',
+    'token_ip': '30/min',
+    'token_username': '10/min',
+}
 
 # Password validation
 
@@ -109,6 +220,8 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
+CSV_PATH = os.getenv('CSV_PATH', default=os.path.join(STATIC_ROOT, 'data'))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -117,15 +230,37 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Пользователь берётся из клеймов токена без запроса к базе.
+STATELESS_JWT_AUTH = os.getenv('STATELESS_JWT_AUTH', default='True') == 'True'
+# Версии токенов кешируются только в общем кеше; с локальным кешем
+# процесса версия читается из базы на каждый запрос.
+TOKEN_VERSION_CACHE_ALIAS = 'default'
+TOKEN_VERSION_CACHE_TIMEOUT = 60
+USER_CACHE_SIZE = 256
+USER_CACHE_TIMEOUT = 60
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'admin@example.com'
+
+# Очередь писем, которую разбирает команда sendemails.
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_RETRY_MAX_DELAY = 3600
+OUTBOX_POLL_INTERVAL = 5
 
 AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    # Сколько прокси (nginx) стоит перед приложением, нужно для
+    # определения IP клиента по X-Forwarded-For.
+    'NUM_PROXIES': (
+        int(os.getenv('NUM_PROXIES')) if os.getenv('NUM_PROXIES') else None
+    ),
 }
@@ -0,0 +1,162 @@
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .timing import timing
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+PLACEHOLDER = re.compile(r'%s')
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+VALUES_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+WHITESPACE = re.compile(r'\s+')
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+# EXPLAIN для SELECT ... FOR UPDATE снова взял бы блокировки строк.
+LOCKING = re.compile(
+    r'\bFOR\s+(NO\s+KEY\s+)?(UPDATE|SHARE|KEY\s+SHARE)\b', re.IGNORECASE
+)
+
+# Кадры этих модулей пропускаются при поиске места вызова.
+INSTRUMENTATION_MODULES = (__name__, 'api_yamdb.timing')
+
+
+class SlowQueryLog:
+    # Кольцевой буфер последних медленных запросов одного процесса.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.entries = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+
+    def add(self, entry):
+        with self.lock:
+            if self.entries.maxlen != settings.SLOW_QUERY_LOG_SIZE:
+                self.entries = deque(
+                    self.entries, maxlen=settings.SLOW_QUERY_LOG_SIZE
+                )
+            entry['id'] = next(self.ids)
+            self.entries.append(entry)
+
+    def snapshot(self):
+        # Сначала самые новые.
+        with self.lock:
+            return list(reversed(self.entries))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+log = SlowQueryLog()
+
+
+def normalize_sql(sql):
+    # Значения заменяются на ?, списки значений (IN, VALUES) сворачиваются,
+    # чтобы одинаковые запросы с разными параметрами выглядели одинаково.
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = VALUES_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def get_call_stack(depth):
+    # Кадры кода проекта, начиная с ближайшего к запросу: serializer,
+    # view или команда, которые его выполнили.
+    base_dir = str(settings.BASE_DIR)
+    stack = []
+    for frame, lineno in traceback.walk_stack(None):
+        filename = frame.f_code.co_filename
+        if (
+            not filename.startswith(base_dir)
+            or 'site-packages' in filename
+            or frame.f_globals.get('__name__') in INSTRUMENTATION_MODULES
+        ):
+            continue
+        stack.append(
+            f'{os.path.relpath(filename, base_dir)}:{lineno} '
+            f'in {frame.f_code.co_name}'
+        )
+        if len(stack) == depth:
+            break
+    return stack
+
+
+def explain(connection, sql, params):
+    if (
+        not settings.SLOW_QUERY_EXPLAIN
+        or not connection.features.supports_explaining_query_execution
+        or not EXPLAINABLE.match(sql)
+        or LOCKING.search(sql)
+    ):
+        return None
+    try:
+        # Курсор драйвера без обёрток execute: EXPLAIN не попадает ни
+        # в этот журнал, ни в Server-Timing.
+        with connection.cursor() as cursor, connection.wrap_database_errors:
+            cursor.cursor.execute(
+                f'{connection.ops.explain_query_prefix()} {sql}', params
+            )
+            rows = cursor.cursor.fetchall()
+    except DatabaseError as error:
+        logger.warning('Could not explain slow query: %s', error)
+        return None
+    return [
+        row if isinstance(row, str) else ' '.join(str(col) for col in row)
+        for row in rows
+    ]
+
+
+def record(sql, params, many, context, duration):
+    connection = context['connection']
+    state = timing.get()
+    stack = get_call_stack(settings.SLOW_QUERY_STACK_DEPTH)
+    log.add({
+        'time': timezone.now().isoformat(),
+        'duration_ms': round(duration * 1000, 1),
+        'sql': normalize_sql(sql),
+        'database': connection.alias,
+        'vendor': connection.vendor,
+        'view': state.view if state is not None else None,
+        'route': state.route if state is not None else None,
+        'call_site': stack[0] if stack else None,
+        'stack': stack,
+        'explain': None if many else explain(connection, sql, params),
+    })
+
+
+def record_slow_queries(execute, sql, params, many, context):
+    if not settings.SLOW_QUERY_LOG:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        # Упавшие запросы (например, по statement_timeout) тоже попадают
+        # в журнал; EXPLAIN для них обычно не выполняется.
+        duration = time.perf_counter() - start
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD:
+            record(sql, params, many, context, duration)
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    # Первая обёртка — внешняя: поиск места вызова и EXPLAIN выполняются
+    # вне замера timing.record_queries и не попадают во время базы
+    # Server-Timing.
+    if record_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_slow_queries)
+
+
+def export_entries(entries):
+    for entry in entries:
+        yield json.dumps(entry, ensure_ascii=False) + '\n'
@@ -0,0 +1,179 @@
+import heapq
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        # Самые долгие запросы к базе: куча из (время, SQL).
+        self.slow_queries = []
+        self.view_start = None
+        self.view_end = None
+        self.durations = None
+        # View и маршрут запроса: по ним журнал медленных SQL-запросов
+        # показывает, откуда пришёл запрос.
+        self.view = None
+        self.route = None
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        item = (duration, self.queries, sql)
+        if len(self.slow_queries) < settings.SLOW_REQUEST_SQL_LIMIT:
+            heapq.heappush(self.slow_queries, item)
+        else:
+            heapq.heappushpop(self.slow_queries, item)
+
+    def metrics(self, start, end):
+        view_start = self.view_start or start
+        view_end = self.view_end or end
+        self.durations = {
+            'db': self.db_time,
+            'view': view_end - view_start,
+            'render': end - view_end,
+            'total': end - start,
+        }
+        return self.durations
+
+
+def record_queries(execute, sql, params, many, context):
+    state = timing.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state.record_query(sql, time.perf_counter() - start)
+
+
+def install_query_timing(sender, connection, **kwargs):
+    # Обёртка ставится на каждое соединение один раз и работает в любом
+    # потоке, где есть состояние текущего запроса (в том числе в потоках
+    # async view).
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+def format_server_timing(metrics, queries):
+    parts = []
+    for name, seconds in metrics.items():
+        part = f'{name};dur={seconds * 1000:.1f}'
+        if name == 'db':
+            part += f';desc="{queries} queries"'
+        parts.append(part)
+    return ', '.join(parts)
+
+
+def get_threshold(request):
+    thresholds = settings.SLOW_REQUEST_THRESHOLDS
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.url_name in thresholds:
+        return thresholds[match.url_name]
+    return thresholds.get('default')
+
+
+class ServerTimingMiddleware:
+    # Время запросов к базе, view и рендеринга каждого запроса. Отдаётся
+    # заголовком Server-Timing (SERVER_TIMING_HEADER), медленные запросы
+    # пишутся в лог вместе с самыми долгими SQL.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestTiming()
+        token = timing.set(state)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.reset(token)
+        if state.view_end is None:
+            # HttpResponse без отложенного рендеринга формируется целиком
+            # во view.
+            state.view_end = time.perf_counter()
+        metrics = state.metrics(start, time.perf_counter())
+        request.timing = state
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = format_server_timing(
+                metrics, state.queries
+            )
+        if response.streaming:
+            # Тело потокового ответа читается уже после выхода из
+            # middleware: его запросы к базе и время попадают в лог
+            # медленных запросов (как render), но не в заголовок.
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, state, start
+            )
+        else:
+            self.check_slow_request(request, response, metrics, state)
+        return response
+
+    def stream(self, content, request, response, state, start):
+        chunks = iter(content)
+        while True:
+            token = timing.set(state)
+            try:
+                chunk = next(chunks, None)
+            finally:
+                timing.reset(token)
+            if chunk is None:
+                break
+            yield chunk
+        metrics = state.metrics(start, time.perf_counter())
+        self.check_slow_request(request, response, metrics, state)
+
+    def check_slow_request(self, request, response, metrics, state):
+        threshold = get_threshold(request)
+        if threshold is not None and metrics['total'] * 1000 >= threshold:
+            self.log_slow_request(request, response, metrics, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = timing.get()
+        if state is not None:
+            state.view_start = time.perf_counter()
+            state.view = getattr(view_func, 'cls', view_func).__name__
+            state.route = request.resolver_match.url_name
+
+    def process_template_response(self, request, response):
+        # Вызывается сразу после view и до рендеринга ответа.
+        self.end_view()
+        return response
+
+    def process_exception(self, request, exception):
+        # Ответ на исключение view (например, Http404) рендерится уже
+        # после него.
+        self.end_view()
+
+    def end_view(self):
+        state = timing.get()
+        if state is not None and state.view_end is None:
+            state.view_end = time.perf_counter()
+
+    def log_slow_request(self, request, response, metrics, state):
+        queries = '\n'.join(
+            f'  {duration * 1000:.1f} ms: {sql}'
+            for duration, _, sql in sorted(state.slow_queries, reverse=True)
+        )
+        logger.warning(
+            'Slow request %s %s (%s): total %.1f ms, db %.1f ms in %d '
+            'queries, view %.1f ms, render %.1f ms\n%s',
+            request.method,
+            request.get_full_path(),
+            response.status_code,
+            metrics['total'] * 1000,
+            metrics['db'] * 1000,
+            state.queries,
+            metrics['view'] * 1000,
+            metrics['render'] * 1000,
+            queries,
+        )
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import get_resolver, resolve
+from django.utils.module_loading import autodiscover_modules
+
+# Модули приложений, которые иначе импортируются только первым запросом.
+WARMUP_MODULES = (
+    'admin', 'filters', 'pagination', 'permissions', 'serializers',
+    'signals', 'urls', 'views',
+)
+
+
+def import_apps():
+    autodiscover_modules(*WARMUP_MODULES)
+
+
+def build_urls():
+    # reverse_dict заполняет резолвер целиком, включая маршруты роутера.
+    get_resolver().reverse_dict
+    for path in settings.WARMUP_URLS:
+        resolve(path)
+
+
+def open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def prime_caches():
+    # Запросы выполняются прямо через view, без middleware, и заполняют
+    # кеш каталога так же, как первые запросы клиентов.
+    factory = RequestFactory(HTTP_HOST=settings.WARMUP_HOST)
+    for path in settings.WARMUP_URLS:
+        match = resolve(path)
+        view = match.func
+        if asyncio.iscoroutinefunction(view):
+            view = async_to_sync(view)
+        response = view(factory.get(path), *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+
+
+WARMUP_STEPS = (
+    ('import_apps', import_apps),
+    ('build_urls', build_urls),
+    ('open_connections', open_connections),
+    ('prime_caches', prime_caches),
+)
+
+
+def warm_up(steps=None):
+    timings = []
+    for name, step in WARMUP_STEPS:
+        if steps is not None and name not in steps:
+            continue
+        start = time.perf_counter()
+        step()
+        timings.append((name, time.perf_counter() - start))
+    return timings
@@ -0,0 +1,40 @@
+# Приложение загружается в мастере до fork: импорты и маршруты строятся
+# один раз и достаются воркерам готовыми.
+preload_app = True
+
+
+def when_ready(server):
+    from django.core.management import call_command
+    from django.db import connections
+
+    from api_yamdb.metrics import clear_store
+    from api_yamdb.warmup import warm_up
+
+    # Ошибки проверок (например, локальный кеш при SHARED_CACHE_REQUIRED)
+    # останавливают мастер до запуска воркеров.
+    call_command('check')
+    # Файлы метрик прошлого запуска не должны попасть в суммы.
+    clear_store()
+
+    for name, seconds in warm_up(('import_apps', 'build_urls')):
+        server.log.info('warmup %s: %.1f ms', name, seconds * 1000)
+    # Соединения с базой нельзя передавать воркерам через fork.
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    from api_yamdb.warmup import warm_up
+
+    # Прогрев не обязателен: если база ещё недоступна, воркер всё равно
+    # запускается и откроет соединение на первом запросе.
+    for step in ('open_connections', 'prime_caches'):
+        try:
+            [(name, seconds)] = warm_up((step,))
+        except Exception:
+            server.log.warning(
+                'worker %s warmup %s failed', worker.pid, step, exc_info=True
+            )
+            continue
+        server.log.info(
+            'worker %s warmup %s: %.1f ms', worker.pid, name, seconds * 1000
+        )
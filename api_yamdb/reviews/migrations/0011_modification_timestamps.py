@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 17:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата изменения комментариев'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата изменения отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = (
+    "ALTER TABLE reviews_title ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX reviews_title_search_idx ON reviews_title "
+    "USING GIN (search_vector)",
+)
+POSTGRESQL_BACKWARD = (
+    "DROP INDEX IF EXISTS reviews_title_search_idx",
+    "ALTER TABLE reviews_title DROP COLUMN IF EXISTS search_vector",
+)
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE reviews_title_fts "
+    "USING fts5(name, description, tokenize='unicode61')",
+    "INSERT INTO reviews_title_fts (rowid, name, description) "
+    "SELECT id, name, COALESCE(description, '') FROM reviews_title",
+)
+SQLITE_BACKWARD = (
+    "DROP TABLE IF EXISTS reviews_title_fts",
+)
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgresql,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, ())
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_modification_timestamps'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRESQL_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRESQL_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
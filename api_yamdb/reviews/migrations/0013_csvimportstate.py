@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CsvImportState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, unique=True, verbose_name='Имя файла')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Контрольная сумма загруженных строк')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Загружено строк')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from users.models import User
 
 
@@ -43,6 +44,12 @@ class Title(models.Model):
         null=True,
         on_delete=models.SET_NULL
     )
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    reviews_updated_at = models.DateTimeField(
+        'Дата изменения отзывов', default=timezone.now)
 
     class Meta:
         indexes = [
@@ -55,6 +62,12 @@ class Title(models.Model):
     def __str__(self):
         return self.name[:50]
 
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
 
 class Review(models.Model):
     text = models.TextField('Текст ревью')
@@ -66,6 +79,8 @@ class Review(models.Model):
         'Дата добавления', auto_now_add=True)
     title = models.ForeignKey(
         Title, on_delete=models.CASCADE, related_name='reviews')
+    comments_updated_at = models.DateTimeField(
+        'Дата изменения комментариев', default=timezone.now)
 
     class Meta:
         constraints = [
@@ -74,6 +89,17 @@ class Review(models.Model):
                 name='Unique review'
             )
         ]
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'])
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -84,3 +110,19 @@ class Comment(models.Model):
     text = models.TextField('Текст комментария')
     pub_date = models.DateTimeField(
         'Дата добавления', auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'])
+        ]
+
+
+class CsvImportState(models.Model):
+    file_name = models.CharField('Имя файла', max_length=255, unique=True)
+    checksum = models.CharField(
+        'Контрольная сумма загруженных строк', max_length=64)
+    rows = models.PositiveIntegerField('Загружено строк', default=0)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    def __str__(self):
+        return self.file_name
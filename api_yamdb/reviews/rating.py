@@ -0,0 +1,50 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Review, Title
+
+
+def change_rating(title_id, score_delta, count_delta, using=None):
+    now = timezone.now()
+    Title.objects.using(using).filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+        updated_at=now,
+        reviews_updated_at=now,
+    )
+
+
+def _review_aggregate(aggregate):
+    reviews = (
+        Review.objects
+        .filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Coalesce(
+        Subquery(reviews, output_field=IntegerField()), 0
+    )
+
+
+def rebuild_ratings(titles=None):
+    if titles is None:
+        titles = Title.objects.all()
+    return titles.update(
+        rating_sum=_review_aggregate(Sum('score')),
+        rating_count=_review_aggregate(Count('pk')),
+        updated_at=timezone.now(),
+    )
+
+
+def find_rating_mismatches(titles=None):
+    if titles is None:
+        titles = Title.objects.all()
+    return titles.annotate(
+        actual_sum=_review_aggregate(Sum('score')),
+        actual_count=_review_aggregate(Count('pk')),
+    ).filter(
+        ~Q(rating_sum=F('actual_sum')) | ~Q(rating_count=F('actual_count'))
+    )
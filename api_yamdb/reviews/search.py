@@ -0,0 +1,101 @@
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'reviews_title_fts'
+
+
+def _vendor(queryset):
+    return connections[queryset.db].vendor
+
+
+def _fts_match(value):
+    # Слова пользователя берём в кавычки, чтобы операторы FTS5
+    # не ломали разбор запроса.
+    words = re.findall(r'\w+', value)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def search_titles(queryset, value):
+    vendor = _vendor(queryset)
+    if vendor == 'postgresql':
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.annotate(
+            search_vector=RawSQL(
+                '"reviews_title"."search_vector"', (),
+                output_field=SearchVectorField()
+            ),
+        ).filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', 'id')
+    if vendor == 'sqlite':
+        match = _fts_match(value)
+        if not match:
+            return queryset.none()
+        # bm25() тем меньше, чем релевантнее строка.
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "reviews_title"."id"',
+            (match,)
+        )
+        matched = RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        )
+        return queryset.filter(id__in=matched).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', 'id')
+    return queryset.filter(
+        Q(name__icontains=value) | Q(description__icontains=value)
+    )
+
+
+def index_title(title, using):
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (title.pk,)
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            (title.pk, title.name, title.description or '')
+        )
+
+
+def unindex_title(title, using):
+    if connections[using].vendor != 'sqlite':
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (title.pk,)
+        )
+
+
+def rebuild_search_index(using='default', titles=None):
+    # В PostgreSQL вектор поиска — генерируемая колонка и пересчитывается
+    # самой базой, в SQLite копию текстов в FTS5 нужно перестроить
+    # целиком или для произведений из titles.
+    if connections[using].vendor != 'sqlite':
+        return
+    delete_where = insert_where = ''
+    params = ()
+    if titles is not None:
+        sql, params = titles.values('id').query.sql_with_params()
+        delete_where = f' WHERE rowid IN ({sql})'
+        insert_where = f' WHERE id IN ({sql})'
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}{delete_where}', params)
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'SELECT id, name, COALESCE(description, \'\') FROM reviews_title'
+            + insert_where, params
+        )
@@ -0,0 +1,146 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from users.models import User
+
+from .models import Category, Comment, Genre, Review, Title
+from .rating import change_rating
+from .search import index_title, unindex_title
+
+
+def touch(queryset, *fields):
+    now = timezone.now()
+    return queryset.update(**{field: now for field in fields})
+
+
+def _lock_rating(instance, using):
+    # Блокируем строку отзыва до конца транзакции, чтобы параллельные
+    # изменения одного отзыва не рассинхронизировали рейтинг.
+    return (
+        Review.objects.using(using)
+        .select_for_update()
+        .filter(pk=instance.pk)
+        .values_list('title_id', 'score')
+        .first()
+    )
+
+
+@receiver(pre_save, sender=Review)
+def lock_saved_review(sender, instance, using, **kwargs):
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = _lock_rating(instance, using)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, using, **kwargs):
+    previous = instance.__dict__.pop('_previous_rating', None)
+    score = int(instance.score)
+    if previous is None:
+        change_rating(instance.title_id, score, 1, using)
+        return
+    title_id, previous_score = previous
+    if title_id != instance.title_id:
+        change_rating(title_id, -previous_score, -1, using)
+        change_rating(instance.title_id, score, 1, using)
+    elif previous_score != score:
+        change_rating(title_id, score - previous_score, 0, using)
+    else:
+        touch(
+            Title.objects.using(using).filter(pk=title_id),
+            'reviews_updated_at'
+        )
+
+
+@receiver(pre_delete, sender=Review)
+def lock_deleted_review(sender, instance, using, **kwargs):
+    instance._previous_rating = _lock_rating(instance, using)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, using, **kwargs):
+    previous = instance.__dict__.pop('_previous_rating', None)
+    if previous is not None:
+        title_id, score = previous
+        change_rating(title_id, -score, -1, using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_thread(sender, instance, using, **kwargs):
+    touch(
+        Review.objects.using(using).filter(pk=instance.review_id),
+        'comments_updated_at'
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_genres(sender, instance, action, reverse, pk_set, using,
+                       **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    titles = Title.objects.using(using)
+    if not reverse:
+        titles = titles.filter(pk=instance.pk)
+    elif action == 'pre_clear':
+        titles = titles.filter(genre=instance)
+    else:
+        titles = titles.filter(pk__in=pk_set)
+    touch(titles, 'updated_at')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, using, **kwargs):
+    touch(Title.objects.using(using).filter(genre=instance), 'updated_at')
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, using, **kwargs):
+    touch(
+        Title.objects.using(using).filter(category=instance), 'updated_at'
+    )
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, using, update_fields, **kwargs):
+    instance._previous_username = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    instance._previous_username = (
+        User.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list('username', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def touch_author_threads(sender, instance, created, using, **kwargs):
+    # Имя автора выводится в отзывах и комментариях, остальные поля
+    # пользователя (last_login, роль) на эти ответы не влияют.
+    previous = instance.__dict__.pop('_previous_username', None)
+    if created or previous is None or previous == instance.username:
+        return
+    touch(
+        Title.objects.using(using).filter(reviews__author=instance),
+        'reviews_updated_at'
+    )
+    touch(
+        Review.objects.using(using).filter(comments__author=instance),
+        'comments_updated_at'
+    )
+
+
+@receiver(post_save, sender=Title)
+def index_saved_title(sender, instance, using, **kwargs):
+    index_title(instance, using)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_deleted_title(sender, instance, using, **kwargs):
+    unindex_title(instance, using)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutboxEmail, User
 
 
 @admin.register(User)
@@ -17,3 +17,18 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ('username', 'role',)
     list_filter = ('username',)
     empty_value_display = '-пусто-'
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'to',
+        'subject',
+        'created_at',
+        'attempts',
+        'sent_at',
+        'last_error',
+    )
+    search_fields = ('to',)
+    list_filter = ('sent_at',)
+    empty_value_display = '-пусто-'
@@ -39,6 +39,8 @@ class User(AbstractUser):
         null=True
     )
     bio = models.TextField('Биография', null=True, blank=True)
+    token_version = models.PositiveIntegerField(
+        'Версия токена', default=0)
 
     class Meta:
         indexes = [
@@ -59,3 +61,36 @@ class User(AbstractUser):
 
     def __str__(self) -> str:
         return self.username
+
+
+class OutboxEmail(models.Model):
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=254)
+    to = models.EmailField('Получатель', max_length=254)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    send_after = models.DateTimeField('Отправить после', db_index=True)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('send_after', 'id')
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['send_after', 'id'],
+                name='outbox_pending_idx',
+                condition=models.Q(sent_at__isnull=True)
+            )
+        ]
+
+    @property
+    def latency(self):
+        if self.sent_at is None:
+            return None
+        return self.sent_at - self.created_at
+
+    def __str__(self) -> str:
+        return f'{self.to}: {self.subject}'
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+class DeliveryStats:
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.latencies = []
+
+    def __bool__(self):
+        return bool(self.sent or self.failed)
+
+    def update(self, other):
+        self.sent += other.sent
+        self.failed += other.failed
+        self.latencies.extend(other.latencies)
+
+    @property
+    def max_latency(self):
+        return max(self.latencies, default=None)
+
+    @property
+    def avg_latency(self):
+        if not self.latencies:
+            return None
+        return sum(self.latencies, timedelta()) / len(self.latencies)
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    # Письмо сохраняется в транзакции запроса и уйдёт только после коммита.
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=to,
+        send_after=timezone.now(),
+    )
+
+
+def retry_delay(attempts):
+    delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX_DELAY))
+
+
+def pending_emails(now=None):
+    return OutboxEmail.objects.filter(
+        sent_at__isnull=True,
+        send_after__lte=now or timezone.now(),
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def send_email(email, connection):
+    EmailMessage(
+        email.subject,
+        email.body,
+        email.from_email,
+        [email.to],
+        connection=connection,
+    ).send()
+
+
+def mark_failed(email, error):
+    email.last_error = f'{type(error).__name__}: {error}'
+    email.send_after = timezone.now() + retry_delay(email.attempts)
+
+
+def send_batch(emails, connection, stats):
+    for email in emails:
+        try:
+            send_email(email, connection)
+        except Exception as error:
+            mark_failed(email, error)
+            stats.failed += 1
+        else:
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            stats.sent += 1
+            stats.latencies.append(email.latency)
+
+
+def deliver_batch(batch_size=None, connection=None):
+    stats = DeliveryStats()
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        # Несколько воркеров забирают разные письма, занятые строки
+        # пропускаются.
+        emails = list(
+            pending_emails().select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not emails:
+            return stats
+        for email in emails:
+            email.attempts += 1
+        connection = connection or get_connection()
+        # Одно соединение с почтовым сервером на всю пачку писем.
+        try:
+            opened = connection.open()
+        except Exception as error:
+            # Почтовый сервер недоступен: попытка и пауза записываются
+            # всей пачке.
+            for email in emails:
+                mark_failed(email, error)
+            stats.failed += len(emails)
+        else:
+            try:
+                send_batch(emails, connection, stats)
+            finally:
+                if opened:
+                    connection.close()
+        OutboxEmail.objects.bulk_update(
+            emails, ['attempts', 'last_error', 'send_after', 'sent_at']
+        )
+    return stats
@@ -1,9 +1,50 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    # Тесты с базой данных гоняем на SQLite в памяти, чтобы для них
+    # не требовался запущенный PostgreSQL.
+    from django.conf import settings
+    from django.db import connections
+    connections.settings = connections.configure_settings({
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+        # Отдельная база для тестов маршрутизации чтения в реплики.
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    })
+    settings.DATABASES['replica'] = dict(connections.settings['replica'])
+    for alias in list(connections.settings):
+        if hasattr(connections._connections, alias):
+            del connections[alias]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from api.authentication import user_cache
+    from django.core.cache import caches
+    for cache in caches.all():
+        cache.clear()
+    user_cache.users.clear()
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path_factory):
+    from api_yamdb.metrics import registry
+    settings.METRICS_DIR = str(tmp_path_factory.mktemp('metrics'))
+    registry.reset()
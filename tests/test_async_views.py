@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+from api.async_views import (ASYNC_READ_URL_NAMES, as_async_view,
+                             async_read_urls)
+from api.urls import router
+from asgiref.sync import async_to_sync
+from django.contrib.auth.tokens import default_token_generator
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test import AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIClient, force_authenticate
+from reviews.models import Category, Title
+from users.models import User
+
+
+def asgi_get(path, token, query_string=b''):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(ASGIHandler())({
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query_string,
+        'headers': [(b'authorization', f'Bearer {token}'.encode())],
+    }, receive, send)
+    [start] = [
+        message for message in messages
+        if message['type'] == 'http.response.start'
+    ]
+    body = b''.join(
+        message.get('body', b'') for message in messages
+        if message['type'] == 'http.response.body'
+    )
+    return start['status'], body
+
+
+def async_views():
+    return {
+        pattern.name: pattern.callback
+        for pattern in async_read_urls(router.urls)
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncViews:
+
+    def test_only_read_urls_are_async(self):
+        for name, callback in async_views().items():
+            assert asyncio.iscoroutinefunction(callback) == (
+                name in ASYNC_READ_URL_NAMES
+            ), f'Проверьте, какие эндпоинты {name} выполняются асинхронно'
+
+    def test_same_response_as_sync(self):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Фильм', year=2000,
+                                     category=category)
+        views = async_views()
+        factory = AsyncRequestFactory()
+        response = async_to_sync(views['title-list'])(
+            factory.get('/api/v1/titles/'))
+        assert response.status_code == 200
+        assert json.loads(response.content) == json.loads(
+            APIClient().get('/api/v1/titles/').content
+        )
+        response = async_to_sync(views['title-detail'])(
+            factory.get(f'/api/v1/titles/{title.pk}/'), pk=title.pk)
+        assert json.loads(response.content)['name'] == 'Фильм'
+        response = async_to_sync(views['title-detail'])(
+            factory.get('/api/v1/titles/0/'), pk=0)
+        assert response.status_code == 404
+
+    def test_streaming_response_is_read_in_thread(self):
+        Title.objects.create(name='Фильм', year=2000)
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        request = AsyncRequestFactory().get('/api/v1/titles/?stream=true')
+        force_authenticate(request, admin)
+        response = async_to_sync(async_views()['title-list'])(request)
+        assert response.streaming
+        assert response['Content-Type'] == 'application/json'
+        with CaptureQueriesContext(connection) as context:
+            content = b''.join(response.streaming_content)
+        assert not context.captured_queries, (
+            'Проверьте, что тело потокового ответа читается в потоке view'
+        )
+        assert [item['name'] for item in json.loads(content)] == ['Фильм']
+
+    def test_cookies_kept(self):
+        def view(request):
+            response = Response({'ok': True})
+            response.set_cookie('seen', '1')
+            return response
+
+        request = AsyncRequestFactory().get('/api/v1/titles/')
+        response = async_to_sync(as_async_view(api_view()(view)))(request)
+        assert response.cookies['seen'].value == '1', (
+            'Проверьте, что async view сохраняет cookies ответа'
+        )
+        assert json.loads(response.content) == {'ok': True}
+
+    def test_sync_streaming_views_under_asgi(self):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        response = APIClient().post('/api/v1/auth/token/', {
+            'username': admin.username,
+            'confirmation_code': default_token_generator.make_token(admin),
+        })
+        token = response.data['token']
+        status, body = asgi_get('/api/v1/export/category/', token)
+        assert status == 200
+        assert body.decode().splitlines()[1:] == [
+            f'{category.pk},Фильм,movie'
+        ], (
+            'Проверьте, что выгрузка под ASGI отдаётся целиком'
+        )
+        status, body = asgi_get(
+            '/api/v1/users/', token, query_string=b'stream=true'
+        )
+        assert status == 200
+        assert [user['username'] for user in json.loads(body)] == ['admin']
@@ -0,0 +1,97 @@
+import pytest
+from api.cache import get_versions
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+
+@pytest.fixture(params=['locmem', 'filebased'])
+def cache_backend(request, settings, tmp_path):
+    backends = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }
+    settings.CACHES = {'default': backends[request.param]}
+    caches['default'].clear()
+    return request.param
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCatalogCache:
+
+    def test_categories_cached_until_change(self, cache_backend):
+        client = APIClient()
+        Category.objects.create(name='Фильмы', slug='movies')
+        response, _ = get(client, '/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS'
+        response, queries = get(client, '/api/v1/categories/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный запрос категорий берётся из кеша'
+        )
+        assert queries == 0, (
+            'Проверьте, что ответ из кеша не обращается к базе данных'
+        )
+        Category.objects.create(name='Книги', slug='books')
+        response, _ = get(client, '/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение категории сбрасывает кеш'
+        )
+        assert response.data['count'] == 2
+
+    def test_title_invalidated_by_review_and_genre(self, cache_backend):
+        client = APIClient()
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/'
+        get(client, url)
+        author = User.objects.create(username='user', email='user@ya.ru')
+        Review.objects.create(title=title, author=author, text='t', score=4)
+        response, _ = get(client, url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['rating'] == 4, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведения'
+        )
+        title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+        response, _ = get(client, url)
+        assert [genre['slug'] for genre in response.data['genre']] == [
+            'drama'
+        ], 'Проверьте, что изменение жанров сбрасывает кеш произведения'
+
+    def test_version_bumped_after_commit(self, cache_backend):
+        [before] = get_versions(['reviews.Category'])
+        with transaction.atomic():
+            Category.objects.create(name='Фильмы', slug='movies')
+            assert get_versions(['reviews.Category']) == [before], (
+                'Проверьте, что версия меняется только после фиксации '
+                'транзакции'
+            )
+        assert get_versions(['reviews.Category']) != [before]
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                Category.objects.create(name='Книги', slug='books')
+                raise ValueError
+        assert get_versions(['reviews.Category']) == [before + 1]
+
+    def test_stats(self, cache_backend):
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        client = APIClient()
+        client.force_authenticate(admin)
+        get(client, '/api/v1/genres/')
+        get(client, '/api/v1/genres/')
+        response, _ = get(client, '/api/v1/catalog-cache/')
+        assert response.data == {'hits': 1, 'misses': 1}
@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import Category, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильмы', slug='movies')
+    return Title.objects.create(name='Фильм', year=2000, category=category)
+
+
+@pytest.fixture
+def user_client():
+    user = User.objects.create(username='user', email='user@ya.ru')
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def assert_not_modified(client, url, etag):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, (
+        f'Проверьте, что GET {url} с актуальным ETag возвращает 304'
+    )
+    assert len(context.captured_queries) == 1, (
+        'Проверьте, что для ответа 304 выполняется только запрос '
+        'отметки времени изменения'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_title_etag(self, title):
+        client = APIClient()
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        url = f'/api/v1/titles/{title.id}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert response.has_header('Last-Modified')
+        assert_not_modified(client, url, etag)
+
+        client.force_authenticate(admin)
+        client.patch(url, {'name': 'Новое название'})
+        client.force_authenticate(None)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение произведения меняет ETag'
+        )
+        assert response.data['name'] == 'Новое название'
+
+    def test_non_numeric_pk(self):
+        response = APIClient().get('/api/v1/titles/abc/')
+        assert response.status_code == 404, (
+            'Проверьте, что запрос произведения с нечисловым id '
+            'возвращает 404'
+        )
+
+    def test_reviews_and_comments_etag(self, title, user_client):
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = user_client.get(reviews_url)['ETag']
+        assert_not_modified(user_client, reviews_url, etag)
+        response = user_client.post(reviews_url, {'text': 'Ок', 'score': 7})
+        assert response.status_code == 201
+        response = user_client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов'
+        )
+        title_response = user_client.get(f'/api/v1/titles/{title.id}/')
+        assert title_response.data['rating'] == 7
+
+        review = Review.objects.get()
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        etag = user_client.get(comments_url)['ETag']
+        assert_not_modified(user_client, comments_url, etag)
+        user_client.post(comments_url, {'text': 'Комментарий'})
+        response = user_client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag комментариев'
+        )
+
+    def test_author_rename_changes_etag(self, title):
+        author = User.objects.create(username='author', email='author@ya.ru')
+        Review.objects.create(title=title, author=author, text='Ок', score=7)
+        client = APIClient()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+
+        author.last_login = timezone.now()
+        author.save(update_fields=['last_login'])
+        author.role = 'moderator'
+        author.save()
+        assert_not_modified(client, url, etag)
+
+        author.username = 'renamed'
+        author.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что смена имени автора меняет ETag списка отзывов'
+        )
+        assert response.data['results'][0]['author'] == 'renamed'
@@ -0,0 +1,115 @@
+import time
+
+import pytest
+from django.core import signals
+from rest_framework.test import APIClient
+from users.models import User
+
+from api_yamdb import dbconnections
+
+
+class FakeConnection:
+    def __init__(self, usable=True, errors=False, close_at=None):
+        self.connection = object()
+        self.settings_dict = {'AUTOCOMMIT': True}
+        self.autocommit = True
+        self.usable = usable
+        self.errors_occurred = errors
+        self.close_at = close_at
+        self.checks = 0
+
+    def get_autocommit(self):
+        return self.autocommit
+
+    def is_usable(self):
+        self.checks += 1
+        return self.usable
+
+    def close(self):
+        self.connection = None
+
+
+class TestRecycle:
+
+    def test_reused_after_health_check(self):
+        connection = FakeConnection(close_at=time.monotonic() + 60)
+        assert dbconnections.recycle(connection, health_check=True) == (
+            'reused')
+        assert connection.checks == 1
+        assert connection.connection is not None
+
+    def test_dead_connection_discarded(self):
+        connection = FakeConnection(usable=False)
+        assert dbconnections.recycle(connection, health_check=True) == (
+            'discarded')
+        assert connection.connection is None, (
+            'Проверьте, что нерабочее соединение закрывается до запроса'
+        )
+
+    def test_health_checks_disabled(self, settings):
+        settings.DB_CONN_HEALTH_CHECKS = False
+        connection = FakeConnection(usable=False)
+        assert dbconnections.recycle(connection, health_check=True) == (
+            'reused')
+        assert connection.checks == 0
+
+    def test_recently_used_not_checked(self, settings):
+        settings.DB_CONN_HEALTH_CHECK_IDLE = 10
+        connection = FakeConnection(usable=False)
+        assert dbconnections.recycle(connection) is None
+        assert dbconnections.recycle(connection, health_check=True) == (
+            'reused')
+        assert connection.checks == 0, (
+            'Проверьте, что недавно использованное соединение не '
+            'проверяется на каждый запрос'
+        )
+        connection.idle_since -= 10
+        assert dbconnections.recycle(connection, health_check=True) == (
+            'discarded')
+        assert connection.checks == 1
+
+    def test_recycled_after_errors(self):
+        connection = FakeConnection(usable=False, errors=True)
+        assert dbconnections.recycle(connection) == 'discarded'
+        connection = FakeConnection(errors=True)
+        assert dbconnections.recycle(connection, health_check=True) == (
+            'reused')
+        assert not connection.errors_occurred
+        assert connection.checks == 1
+
+    def test_expired(self):
+        connection = FakeConnection(close_at=time.monotonic() - 1)
+        assert dbconnections.recycle(connection) == 'expired'
+        assert connection.connection is None
+
+    def test_autocommit_changed(self):
+        connection = FakeConnection()
+        connection.autocommit = False
+        assert dbconnections.recycle(connection) == 'discarded'
+
+    def test_connected_to_request_signals(self):
+        for signal, receiver in (
+            (signals.request_started, dbconnections.on_request_started),
+            (signals.request_finished, dbconnections.on_request_finished),
+        ):
+            assert receiver in [ref() for _, ref in signal.receivers]
+
+
+@pytest.mark.django_db
+class TestConnectionStats:
+
+    def test_endpoint(self):
+        dbconnections.stats.reset()
+        dbconnections.stats.increment('opened')
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get('/api/v1/db-connections/')
+        assert response.status_code == 200
+        assert response.data['opened'] == 1
+        assert set(response.data) == {
+            'opened', 'reused', 'expired', 'discarded'}
+        user = User.objects.create(username='user', email='user@ya.ru')
+        client.force_authenticate(user)
+        assert client.get('/api/v1/db-connections/').status_code == 403
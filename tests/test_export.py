@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from users.models import User
+
+from .test_importcsv import CSV_DATA
+
+
+@pytest.fixture
+def imported(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    for name, content in CSV_DATA.items():
+        (source / name).write_text(content, encoding='utf-8')
+    call_command('importcsv', path=str(source))
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_export_round_trip(self, imported, tmp_path):
+        target = tmp_path / 'export'
+        call_command('exportcsv', 'titles', 'genre_title', output=str(target))
+        for name in ('titles.csv', 'genre_title.csv'):
+            exported = (target / name).read_text(encoding='utf-8')
+            assert exported.splitlines() == CSV_DATA[name].splitlines(), (
+                f'Проверьте, что {name} выгружается в формате importcsv'
+            )
+
+    def test_export_endpoint(self, imported):
+        client = APIClient()
+        response = client.get('/api/v1/export/review/')
+        assert response.status_code == 401
+        admin = User.objects.get(username='capt_obvious')
+        client.force_authenticate(admin)
+        response = client.get('/api/v1/export/review/?output=ndjson')
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоковым ответом'
+        )
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        assert [row['id'] for row in rows] == [1, 2]
+        assert rows[0]['author'] == 100
+        assert client.get('/api/v1/export/unknown/').status_code == 404
@@ -0,0 +1,62 @@
+import pytest
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def catalog():
+    genres = {
+        slug: Genre.objects.create(name=slug, slug=slug)
+        for slug in ('drama', 'comedy', 'horror')
+    }
+    categories = {
+        slug: Category.objects.create(name=slug, slug=slug)
+        for slug in ('movie', 'book', 'music')
+    }
+    items = (
+        ('Драмеди', 1990, 'movie', ('drama', 'comedy')),
+        ('Драма', 2000, 'book', ('drama',)),
+        ('Комедия', 2010, 'movie', ('comedy',)),
+        ('Ужасы', 2020, 'music', ('horror', 'drama')),
+    )
+    for name, year, category, title_genres in items:
+        title = Title.objects.create(
+            name=name, year=year, category=categories[category])
+        title.genre.set(genres[slug] for slug in title_genres)
+
+
+def names(params):
+    response = APIClient().get('/api/v1/titles/', params)
+    assert response.status_code == 200
+    return sorted(title['name'] for title in response.data['results'])
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    def test_genre_any(self, catalog):
+        assert names({'genre': 'drama,comedy'}) == [
+            'Драма', 'Драмеди', 'Комедия', 'Ужасы'
+        ], 'Проверьте, что фильтр по жанрам не возвращает дубликаты'
+
+    def test_genre_all(self, catalog):
+        assert names({'genre': 'drama,comedy', 'genre_mode': 'all'}) == [
+            'Драмеди'
+        ]
+        assert names({'genre': 'drama', 'genre_mode': 'all'}) == [
+            'Драма', 'Драмеди', 'Ужасы'
+        ]
+
+    def test_genre_is_exact(self, catalog):
+        assert names({'genre': 'dram'}) == [], (
+            'Проверьте, что жанр фильтруется по точному совпадению slug'
+        )
+
+    def test_category(self, catalog):
+        assert names({'category': 'movie'}) == ['Драмеди', 'Комедия']
+        assert names({'category__in': 'book,music'}) == ['Драма', 'Ужасы']
+
+    def test_year_range(self, catalog):
+        assert names({'year_min': 2000, 'year_max': 2010}) == [
+            'Драма', 'Комедия'
+        ]
@@ -0,0 +1,190 @@
+from io import StringIO
+
+import pytest
+from api.cache import get_versions
+from django.core.management import CommandError, call_command
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.search import search_titles
+from users.models import User
+
+from api_yamdb.csvdata import keep_auto_now_add
+
+CSV_DATA = {
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n2,Книга,book\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n2,Комедия,comedy\n',
+    'titles.csv': (
+        'id,name,year,category\n'
+        '1,Побег из Шоушенка,1994,1\n'
+        '2,Мастер и Маргарита,1967,2\n'
+    ),
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,2,1\n3,2,2\n',
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,bingobongo,bingobongo@yamdb.fake,user,,,\n'
+        '101,capt_obvious,capt_obvious@yamdb.fake,admin,,,\n'
+    ),
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,Отлично,100,10,2019-09-24T21:08:21.567Z\n'
+        '2,1,Хорошо,101,7,2019-09-25T21:08:21.567Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,101,2019-09-26T21:08:21.567Z\n'
+    ),
+}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    for name, content in CSV_DATA.items():
+        (tmp_path / name).write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestImportCsv:
+
+    def test_import(self, csv_path):
+        call_command('importcsv', path=str(csv_path), batch_size=1)
+        assert Category.objects.count() == 2
+        assert Genre.objects.count() == 2
+        assert User.objects.count() == 2
+        assert Comment.objects.count() == 1
+        title = Title.objects.get(pk=2)
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ]
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat().startswith('2019-09-24T21:08'), (
+            'Проверьте, что импорт сохраняет даты из файла'
+        )
+        assert Title.objects.get(pk=1).rating == 8.5, (
+            'Проверьте, что после импорта пересчитывается рейтинг'
+        )
+        assert Category.objects.create(name='Музыка', slug='music').pk == 3
+
+    def test_import_twice_updates_rows(self, csv_path):
+        call_command('importcsv', path=str(csv_path))
+        (csv_path / 'category.csv').write_text(
+            'id,name,slug\n1,Кино,movie\n2,Книга,book\n', encoding='utf-8')
+        call_command('importcsv', path=str(csv_path))
+        assert Category.objects.get(pk=1).name == 'Кино'
+        assert Title.genre.through.objects.count() == 3
+
+    def test_missing_reference_rolls_back(self, csv_path):
+        (csv_path / 'comments.csv').write_text(
+            'id,review_id,text,author,pub_date\n'
+            '1,42,Нет отзыва,101,2019-09-26T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        with pytest.raises(CommandError, match='comments.csv, строка 2'):
+            call_command('importcsv', path=str(csv_path))
+        assert not Category.objects.exists(), (
+            'Проверьте, что импорт выполняется в одной транзакции'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestIncrementalImportCsv:
+
+    def run(self, csv_path, **options):
+        out = StringIO()
+        call_command(
+            'importcsv', path=str(csv_path), incremental=True, stdout=out,
+            **options
+        )
+        return out.getvalue()
+
+    def test_unchanged_files_are_skipped(self, csv_path):
+        self.run(csv_path)
+        assert Review.objects.count() == 2
+        output = self.run(csv_path)
+        assert 'review.csv: пропущено 2, обработано 0' in output, (
+            'Проверьте, что неизменённые файлы не загружаются повторно'
+        )
+
+    def test_appended_and_changed_rows(self, csv_path):
+        self.run(csv_path)
+        with open(csv_path / 'titles.csv', 'a', encoding='utf-8') as f:
+            f.write('3,Бойцовский клуб,1999,1\n')
+        output = self.run(csv_path)
+        assert 'titles.csv: пропущено 2, обработано 1' in output
+        assert Title.objects.get(pk=3).name == 'Бойцовский клуб'
+
+        (csv_path / 'category.csv').write_text(
+            'id,name,slug\n1,Кино,movie\n2,Книга,book\n', encoding='utf-8')
+        output = self.run(csv_path)
+        assert 'category.csv: пропущено 0, обработано 2' in output
+        assert Category.objects.get(pk=1).name == 'Кино', (
+            'Проверьте, что изменённые строки обновляются через upsert'
+        )
+
+    def test_resume_after_failure(self, csv_path):
+        comments = (
+            'id,review_id,text,author,pub_date\n'
+            '1,1,Согласен,101,2019-09-26T21:08:21.567Z\n'
+            '2,2,Верно,100,2019-09-27T21:08:21.567Z\n'
+        )
+        (csv_path / 'comments.csv').write_text(
+            comments + '3,42,Нет отзыва,101,2019-09-28T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        with pytest.raises(CommandError):
+            self.run(csv_path, batch_size=1)
+        assert Comment.objects.count() == 2, (
+            'Проверьте, что зафиксированные пакеты сохраняются при ошибке'
+        )
+        (csv_path / 'comments.csv').write_text(
+            comments + '3,1,Есть отзыв,101,2019-09-28T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        output = self.run(csv_path, batch_size=1)
+        assert 'comments.csv: пропущено 2, обработано 1' in output, (
+            'Проверьте, что импорт продолжается с последнего пакета'
+        )
+        assert Comment.objects.count() == 3
+        assert Review.objects.get(pk=1).comments.count() == 2
+
+    def test_only_affected_rows_refreshed(self, csv_path):
+        self.run(csv_path)
+        before = dict(Title.objects.values_list('id', 'updated_at'))
+        # Отзыв 2 переносится на произведение 2: пересчитываются оба.
+        (csv_path / 'review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            '1,1,Отлично,100,10,2019-09-24T21:08:21.567Z\n'
+            '2,2,Хорошо,101,7,2019-09-25T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        with open(csv_path / 'titles.csv', 'a', encoding='utf-8') as f:
+            f.write('3,Бойцовский клуб,1999,\n')
+        self.run(csv_path)
+        titles = Title.objects.in_bulk()
+        assert titles[1].rating == 10
+        assert titles[2].rating == 7
+        assert titles[1].updated_at > before[1]
+        assert titles[2].updated_at > before[2]
+        assert search_titles(Title.objects.all(), 'клуб').count() == 1
+        updated = titles[3].updated_at
+        [version] = get_versions(['reviews.Title'])
+        (csv_path / 'comments.csv').write_text(
+            'id,review_id,text,author,pub_date\n'
+            '1,1,Согласен,101,2019-09-26T21:08:21.567Z\n'
+            '2,1,Тоже,100,2019-09-27T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        self.run(csv_path)
+        assert Title.objects.get(pk=3).updated_at == updated, (
+            'Проверьте, что инкрементальный импорт не трогает '
+            'незатронутые произведения'
+        )
+        assert get_versions(['reviews.Title']) == [version]
+
+
+def test_keep_auto_now_add_restores_fields():
+    field = Review._meta.get_field('pub_date')
+    with pytest.raises(ValueError):
+        with keep_auto_now_add(Review):
+            assert not field.auto_now_add
+            raise ValueError
+    assert field.auto_now_add
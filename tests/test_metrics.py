@@ -0,0 +1,138 @@
+import multiprocessing
+import re
+import time
+
+import pytest
+from rest_framework.test import APIClient
+from users.models import User
+
+from api_yamdb.metrics import read_store, registry
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create(
+        username='admin', email='admin@ya.ru', role='admin')
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+def sample(text, line):
+    match = re.search(rf'^{re.escape(line)} (\S+)$', text, re.MULTILINE)
+    assert match, f'Проверьте, что /metrics содержит {line}'
+    return float(match.group(1))
+
+
+def worker_requests():
+    registry.inc('yamdb_http_requests_total', {
+        'route': 'title-list', 'method': 'GET', 'status': '2xx'}, 5)
+    registry.observe('yamdb_http_request_duration_seconds', {
+        'route': 'title-list', 'method': 'GET'}, 0.02)
+    registry.flush(force=True)
+
+
+def worker_cache_hits():
+    registry.inc('yamdb_catalog_cache_requests_total', {'result': 'hit'}, 3)
+    registry.inc('yamdb_throttle_rejections_total', {'scope': 'token_ip'})
+    registry.flush(force=True)
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_route_metrics(self, admin_client):
+        client = APIClient()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/100/')
+        response = admin_client.get('/metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert sample(text, (
+            'yamdb_http_requests_total'
+            '{method="GET",route="title-list",status="2xx"}'
+        )) == 2
+        assert sample(text, (
+            'yamdb_http_requests_total'
+            '{method="GET",route="title-detail",status="4xx"}'
+        )) == 1
+        assert sample(text, (
+            'yamdb_http_request_duration_seconds_bucket'
+            '{method="GET",route="title-list",le="+Inf"}'
+        )) == 2
+        assert sample(text, (
+            'yamdb_http_request_duration_seconds_count'
+            '{method="GET",route="title-list"}'
+        )) == 2
+        assert sample(
+            text, 'yamdb_db_queries_total{route="title-list"}') > 0
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in text
+
+    def test_cache_hit_ratio(self, admin_client):
+        client = APIClient()
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        text = admin_client.get('/metrics').content.decode()
+        assert sample(text, 'yamdb_catalog_cache_hit_ratio') == 0.5
+        assert sample(
+            text, 'yamdb_catalog_cache_requests_total{result="hit"}') == 1
+
+    def test_aggregates_worker_processes(self, admin_client):
+        APIClient().get('/api/v1/titles/')
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=worker_requests) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+        text = admin_client.get('/metrics').content.decode()
+        assert sample(text, (
+            'yamdb_http_requests_total'
+            '{method="GET",route="title-list",status="2xx"}'
+        )) == 11, 'Проверьте, что метрики суммируются по всем воркерам'
+        assert sample(text, (
+            'yamdb_http_request_duration_seconds_bucket'
+            '{method="GET",route="title-list",le="0.025"}'
+        )) >= 2
+
+    def test_cache_and_throttle_stats_aggregated(self, admin_client):
+        worker = multiprocessing.get_context('fork').Process(
+            target=worker_cache_hits
+        )
+        worker.start()
+        worker.join()
+        assert worker.exitcode == 0
+        APIClient().get('/api/v1/genres/')
+        response = admin_client.get('/api/v1/catalog-cache/')
+        assert response.data == {'hits': 3, 'misses': 1}, (
+            'Проверьте, что статистика кеша суммируется по всем воркерам'
+        )
+        response = admin_client.get('/api/v1/auth/throttle-stats/')
+        assert response.data['token_ip'] == 1
+        text = admin_client.get('/metrics').content.decode()
+        assert sample(text, 'yamdb_catalog_cache_hit_ratio') == 0.75
+
+    def test_pending_changes_flushed(self, settings):
+        settings.METRICS_FLUSH_INTERVAL = 0.05
+        metric = 'yamdb_throttle_rejections_total'
+        key = (metric, (('scope', 'token_ip'),))
+        registry.inc(metric, {'scope': 'token_ip'})
+        registry.flush()
+        registry.inc(metric, {'scope': 'token_ip'})
+        registry.flush()
+        assert read_store()[0][key] == 1
+        time.sleep(0.2)
+        assert read_store()[0][key] == 2, (
+            'Проверьте, что изменения после последней записи попадают в '
+            'файл метрик без новых запросов'
+        )
+
+    def test_admin_only(self):
+        assert APIClient().get('/metrics').status_code == 401
+        user = User.objects.create(username='user', email='user@ya.ru')
+        client = APIClient()
+        client.force_authenticate(user)
+        assert client.get('/metrics').status_code == 403
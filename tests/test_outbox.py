@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users import outbox
+from users.models import OutboxEmail
+
+
+def signup(username='user'):
+    return APIClient().post('/api/v1/auth/signup/', {
+        'username': username, 'email': f'{username}@ya.ru'})
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_enqueues_email(self):
+        response = signup()
+        assert response.status_code == 200
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо в запросе'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.to == 'user@ya.ru'
+        assert email.sent_at is None
+
+    def test_invalid_signup_enqueues_nothing(self):
+        response = APIClient().post(
+            '/api/v1/auth/signup/', {'username': 'user', 'email': 'wrong'})
+        assert response.status_code == 400
+        assert not OutboxEmail.objects.exists()
+
+    def test_command_delivers_emails(self):
+        signup('first')
+        signup('second')
+        out = StringIO()
+        call_command('sendemails', stdout=out)
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            'first@ya.ru', 'second@ya.ru']
+        assert 'код подтверждения' in mail.outbox[0].body
+        assert not OutboxEmail.objects.filter(sent_at__isnull=True).exists()
+        assert 'Отправлено: 2' in out.getvalue()
+        call_command('sendemails', stdout=StringIO())
+        assert len(mail.outbox) == 2, (
+            'Проверьте, что отправленные письма не уходят повторно'
+        )
+
+    def test_batch_size(self):
+        for i in range(3):
+            signup(f'user{i}')
+        stats = outbox.deliver_batch(batch_size=2)
+        assert stats.sent == 2
+        assert len(mail.outbox) == 2
+        assert stats.max_latency >= timedelta()
+
+    def test_retry_with_backoff(self, monkeypatch, settings):
+        settings.OUTBOX_RETRY_DELAY = 10
+        signup()
+
+        def fail(email, connection):
+            raise ConnectionError('сервер недоступен')
+
+        monkeypatch.setattr(outbox, 'send_email', fail)
+        started = timezone.now()
+        stats = outbox.deliver_batch()
+        assert stats.failed == 1
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1
+        assert 'сервер недоступен' in email.last_error
+        assert email.send_after >= started + timedelta(seconds=10)
+        assert not outbox.deliver_batch(), (
+            'Проверьте, что письмо не отправляется до истечения паузы'
+        )
+        monkeypatch.undo()
+        email.send_after = timezone.now()
+        email.save()
+        assert outbox.deliver_batch().sent == 1
+        email.refresh_from_db()
+        assert email.attempts == 2
+        assert email.last_error == ''
+
+    def test_connection_failure(self, settings):
+        settings.OUTBOX_RETRY_DELAY = 10
+        signup('first')
+        signup('second')
+
+        class Connection:
+            def open(self):
+                raise ConnectionRefusedError('сервер недоступен')
+
+        started = timezone.now()
+        stats = outbox.deliver_batch(connection=Connection())
+        assert stats.failed == 2, (
+            'Проверьте, что ошибка соединения с почтовым сервером '
+            'засчитывается всей пачке писем'
+        )
+        for email in OutboxEmail.objects.all():
+            assert email.attempts == 1
+            assert 'сервер недоступен' in email.last_error
+            assert email.send_after >= started + timedelta(seconds=10)
+        assert not outbox.deliver_batch()
+
+    def test_loop_survives_errors(self, monkeypatch):
+        class Stop(Exception):
+            pass
+
+        calls = []
+
+        def deliver_batch(batch_size):
+            calls.append(batch_size)
+            if len(calls) == 1:
+                raise ConnectionRefusedError('база недоступна')
+            return outbox.DeliveryStats()
+
+        def sleep(seconds):
+            if len(calls) > 1:
+                raise Stop
+
+        command = 'api_yamdb.management.commands.sendemails'
+        monkeypatch.setattr(f'{command}.deliver_batch', deliver_batch)
+        monkeypatch.setattr(f'{command}.time.sleep', sleep)
+        err = StringIO()
+        with pytest.raises(Stop):
+            call_command('sendemails', '--loop', stderr=err)
+        assert len(calls) == 2, (
+            'Проверьте, что sendemails --loop повторяет отправку после ошибки'
+        )
+        assert 'база недоступна' in err.getvalue()
+
+    def test_max_attempts(self, settings):
+        settings.OUTBOX_MAX_ATTEMPTS = 1
+        signup()
+        OutboxEmail.objects.update(attempts=1)
+        assert not outbox.deliver_batch()
+        assert not mail.outbox
+
+    def test_file_backend(self, settings, tmp_path):
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend')
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        signup('first')
+        signup('second')
+        assert outbox.deliver_batch().sent == 2
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        content = files[0].read_text()
+        assert 'first@ya.ru' in content and 'second@ya.ru' in content
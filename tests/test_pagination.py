@@ -0,0 +1,77 @@
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def title_with_reviews():
+    title = Title.objects.create(name='Произведение', year=2000)
+    for i in range(12):
+        author = User.objects.create(
+            username=f'user{i}', email=f'user{i}@ya.ru')
+        Review.objects.create(
+            title=title, author=author, text=f'text {i}', score=5)
+    return title
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def collect(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert 'count' not in response.data, (
+                'Проверьте, что курсорная пагинация не считает COUNT(*)'
+            )
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_reviews_cursor_pagination(self, title_with_reviews):
+        client = APIClient()
+        url = (f'/api/v1/titles/{title_with_reviews.id}/reviews/'
+               '?pagination=cursor')
+        ids = self.collect(client, url)
+        expected = list(
+            title_with_reviews.reviews.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация отзывов обходит все отзывы '
+            'по порядку -pub_date, -id'
+        )
+
+    def test_same_pub_date(self, title_with_reviews):
+        # Отзывы и комментарии из импорта могут иметь одинаковую дату,
+        # порядок между ними задаёт id.
+        pub_date = timezone.now()
+        title_with_reviews.reviews.update(pub_date=pub_date)
+        review = title_with_reviews.reviews.first()
+        for author in User.objects.all():
+            Comment.objects.create(review=review, author=author, text='text')
+        Comment.objects.update(pub_date=pub_date)
+        client = APIClient()
+        reviews_url = f'/api/v1/titles/{title_with_reviews.id}/reviews/'
+        for url, queryset in (
+            (reviews_url, title_with_reviews.reviews),
+            (f'{reviews_url}{review.id}/comments/', review.comments),
+        ):
+            ids = self.collect(client, f'{url}?pagination=cursor')
+            assert ids == list(
+                queryset.order_by('-id').values_list('id', flat=True)
+            ), (
+                'Проверьте, что курсорная пагинация обходит записи с '
+                'одинаковой pub_date по id без пропусков и повторов'
+            )
+
+    def test_page_number_pagination_still_available(self, title_with_reviews):
+        response = APIClient().get(
+            f'/api/v1/titles/{title_with_reviews.id}/reviews/?page=2')
+        assert response.status_code == 200
+        assert response.data['count'] == 12, (
+            'Проверьте, что постраничная пагинация осталась по умолчанию'
+        )
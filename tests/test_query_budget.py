@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+# Максимальное число SQL-запросов на один запрос к эндпоинту.
+QUERY_BUDGETS = {
+    '/api/v1/titles/': 3,
+    '/api/v1/titles/{title_id}/': 3,
+    '/api/v1/categories/': 2,
+    '/api/v1/genres/': 2,
+    '/api/v1/titles/{title_id}/reviews/': 3,
+    '/api/v1/titles/{title_id}/reviews/{review_id}/': 2,
+    '/api/v1/titles/{title_id}/reviews/{review_id}/comments/': 3,
+}
+
+
+@pytest.fixture
+def catalog():
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(4)
+    ]
+    authors = [
+        User.objects.create(username=f'user{i}', email=f'user{i}@ya.ru')
+        for i in range(3)
+    ]
+    titles = []
+    for i in range(12):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000 + i,
+            category=categories[i % len(categories)]
+        )
+        title.genre.set(genres[:i % len(genres) + 1])
+        for author in authors[:i % len(authors) + 1]:
+            review = Review.objects.create(
+                title=title, author=author, text='text', score=i % 10 + 1
+            )
+            for commenter in authors:
+                Comment.objects.create(
+                    review=review, author=commenter, text='text')
+        titles.append(title)
+    return titles
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET {url} возвращает статус 200'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('url, budget', QUERY_BUDGETS.items())
+    def test_endpoint_query_budget(self, catalog, url, budget):
+        title = catalog[-1]
+        url = url.format(
+            title_id=title.id, review_id=title.reviews.first().id
+        )
+        queries = count_queries(APIClient(), url)
+        assert queries <= budget, (
+            f'Проверьте, что GET {url} выполняет не более {budget} '
+            f'SQL-запросов, сейчас: {queries}'
+        )
+
+    def test_titles_queries_do_not_depend_on_page_size(self, catalog):
+        client = APIClient()
+        first_page = count_queries(client, '/api/v1/titles/')
+        last_page = count_queries(client, '/api/v1/titles/?page=3')
+        assert first_page == last_page, (
+            'Проверьте, что число SQL-запросов к /api/v1/titles/ '
+            'не зависит от количества произведений на странице'
+        )
+
+    def test_missing_parents(self, catalog):
+        client = APIClient()
+        title = catalog[0]
+        review = title.reviews.first()
+        other_title = catalog[1]
+        assert client.get('/api/v1/titles/0/reviews/').status_code == 404
+        url = (f'/api/v1/titles/{other_title.id}/reviews/'
+               f'{review.id}/comments/')
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что комментарии ищутся по title_id и review_id'
+        )
@@ -0,0 +1,86 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+from reviews.models import Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def title():
+    return Title.objects.create(name='Произведение', year=2000)
+
+
+@pytest.fixture
+def authors():
+    return [
+        User.objects.create(username=f'user{i}', email=f'user{i}@ya.ru')
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestRating:
+
+    def test_rating_follows_reviews(self, title, authors):
+        title.refresh_from_db()
+        assert title.rating is None, (
+            'Проверьте, что у произведения без отзывов нет рейтинга'
+        )
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='text', score=score)
+            for author, score in zip(authors, (2, 6, 10))
+        ]
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (18, 3)
+        assert title.rating == 6
+
+        reviews[0].score = 8
+        reviews[0].save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (24, 3), (
+            'Проверьте, что рейтинг пересчитывается при изменении отзыва'
+        )
+
+        reviews[1].delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (18, 2), (
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва'
+        )
+
+    def test_rating_on_author_cascade(self, title, authors):
+        for author in authors:
+            Review.objects.create(
+                title=title, author=author, text='text', score=5)
+        authors[0].delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (10, 2), (
+            'Проверьте, что рейтинг учитывает каскадное удаление отзывов'
+        )
+
+    def test_rebuild_ratings(self, title, authors):
+        Review.objects.create(
+            title=title, author=authors[0], text='text', score=7)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        with pytest.raises(
+            CommandError, match=f'у произведений: {title.pk}$'
+        ):
+            call_command('rebuildratings', '--check')
+        call_command('rebuildratings')
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (7, 1)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_ratings_resets_catalog_cache(title, authors):
+    Review.objects.create(
+        title=title, author=authors[0], text='text', score=7)
+    Title.objects.update(rating_sum=0, rating_count=0)
+    url = f'/api/v1/titles/{title.id}/'
+    assert APIClient().get(url).data['rating'] is None
+    call_command('rebuildratings', stdout=StringIO())
+    assert APIClient().get(url).data['rating'] == 7, (
+        'Проверьте, что после пересчёта рейтингов кеш каталога сброшен'
+    )
@@ -0,0 +1,109 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.checks import Error
+from rest_framework.test import APIClient
+from reviews.models import Category, Review, Title
+from users.models import User
+
+from api_yamdb.checks import check_shared_caches
+
+DATABASES = ['default', 'replica']
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+
+
+@pytest.fixture
+def admin():
+    # Пользователь и произведение есть в обеих базах, как после репликации.
+    for alias in DATABASES:
+        User.objects.using(alias).create(
+            pk=1, username='admin', email='admin@ya.ru', role='admin')
+        Title.objects.using(alias).create(pk=1, name='Фильм', year=2000)
+    return User.objects.get(pk=1)
+
+
+def texts(response):
+    return [item['text'] for item in response.data['results']]
+
+
+def token_client(user):
+    response = APIClient().post('/api/v1/auth/token/', {
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["token"]}')
+    return client
+
+
+# Внутри транзакции чтения идут в основную базу, поэтому тесты без
+# оборачивающей транзакции.
+@pytest.mark.django_db(databases=DATABASES, transaction=True)
+class TestReplicaRouter:
+
+    def test_reads_go_to_replica(self, admin):
+        Review.objects.using('replica').create(
+            title_id=1, author_id=1, text='Реплика', score=5)
+        response = APIClient().get('/api/v1/titles/1/reviews/')
+        assert texts(response) == ['Реплика'], (
+            'Проверьте, что GET-запросы читают из реплики'
+        )
+
+    def test_cache_miss_reads_primary(self):
+        Category.objects.using('replica').create(name='Реплика', slug='r')
+        Category.objects.create(name='Основная', slug='p')
+        response = APIClient().get('/api/v1/categories/')
+        assert [item['slug'] for item in response.data['results']] == [
+            'p'], (
+            'Проверьте, что ответ для кеша каталога строится по основной базе'
+        )
+
+    def test_writes_go_to_primary(self, admin):
+        response = token_client(admin).post(
+            '/api/v1/titles/1/reviews/', {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        assert Review.objects.using('default').filter(text='Отзыв').exists()
+        assert not Review.objects.using('replica').exists()
+
+    def test_read_your_writes(self, admin, settings):
+        client = token_client(admin)
+        client.post('/api/v1/titles/1/reviews/', {'text': 'Отзыв', 'score': 5})
+        assert texts(client.get('/api/v1/titles/1/reviews/')) == ['Отзыв'], (
+            'Проверьте, что после изменения пользователь читает из основной '
+            'базы'
+        )
+        assert texts(APIClient().get('/api/v1/titles/1/reviews/')) == [], (
+            'Проверьте, что другие пользователи читают из реплики'
+        )
+
+    def test_window_expires(self, admin, settings):
+        settings.READ_YOUR_WRITES_WINDOW = 0
+        client = token_client(admin)
+        client.post('/api/v1/titles/1/reviews/', {'text': 'Отзыв', 'score': 5})
+        assert texts(client.get('/api/v1/titles/1/reviews/')) == []
+
+    def test_no_replicas(self, admin, settings):
+        settings.DATABASE_REPLICAS = []
+        Review.objects.create(title_id=1, author_id=1, text='Отзыв', score=5)
+        assert texts(APIClient().get('/api/v1/titles/1/reviews/')) == [
+            'Отзыв']
+
+
+def test_pin_cache_must_be_shared(settings):
+    settings.SHARED_CACHE_REQUIRED = True
+    settings.DATABASE_REPLICAS = []
+    assert not [
+        message for message in check_shared_caches(None)
+        if 'READ_YOUR_WRITES_CACHE_ALIAS' in message.msg
+    ]
+    settings.DATABASE_REPLICAS = ['replica']
+    [error] = [
+        message for message in check_shared_caches(None)
+        if 'READ_YOUR_WRITES_CACHE_ALIAS' in message.msg
+    ]
+    assert isinstance(error, Error), (
+        'Проверьте, что закрепления за основной базой требуют общего кеша'
+    )
@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Comment, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def thread():
+    title = Title.objects.create(name='Произведение', year=2000)
+    users = [
+        User.objects.create(username=f'user{i}', email=f'user{i}@ya.ru')
+        for i in range(5)
+    ]
+    reviews = [
+        Review.objects.create(
+            title=title, author=user, text='text', score=5)
+        for user in users
+    ]
+    for review in reviews[:4]:
+        for user in users:
+            Comment.objects.create(
+                review=review, author=user, text=f'от {user.username}')
+    return title
+
+
+@pytest.mark.django_db
+class TestReviewThread:
+
+    def test_reviews_with_latest_comments(self, thread):
+        url = f'/api/v1/titles/{thread.id}/reviews/?include=comments'
+        with CaptureQueriesContext(connection) as context:
+            response = APIClient().get(url)
+        assert response.status_code == 200
+        assert len(context.captured_queries) <= 4, (
+            'Проверьте, что отзывы с комментариями загружаются '
+            'фиксированным числом запросов'
+        )
+        first, *_, last = response.data['results']
+        assert first['comments_count'] == 5
+        assert [comment['author'] for comment in first['comments']] == [
+            'user4', 'user3', 'user2'
+        ], 'Проверьте, что возвращаются последние комментарии'
+        assert last['comments_count'] == 0
+        assert last['comments'] == []
+
+    def test_comments_limit_and_etag(self, thread):
+        client = APIClient()
+        url = (f'/api/v1/titles/{thread.id}/reviews/'
+               '?include=comments&comments_limit=1')
+        response = client.get(url)
+        assert len(response.data['results'][0]['comments']) == 1
+        review = Review.objects.filter(title=thread).first()
+        Comment.objects.create(
+            review=review, author=review.author, text='новый')
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag ленты отзывов'
+        )
+        assert response.data['results'][0]['comments'][0]['text'] == 'новый'
+
+    def test_plain_reviews_unchanged(self, thread):
+        response = APIClient().get(f'/api/v1/titles/{thread.id}/reviews/')
+        assert 'comments' not in response.data['results'][0]
@@ -0,0 +1,69 @@
+import pytest
+from rest_framework.test import APIClient
+from reviews.models import Title
+
+
+@pytest.fixture
+def titles():
+    return [
+        Title.objects.create(
+            name='Властелин колец', year=1954,
+            description='Эпическое фэнтези о кольце всевластия'
+        ),
+        Title.objects.create(
+            name='Хоббит', year=1937,
+            description='Повесть о путешествии за сокровищами и кольце'
+        ),
+        Title.objects.create(
+            name='Дюна', year=1965, description='Песок и пряность'
+        ),
+        # Создано последним, но слово «кольце» встречается в коротком
+        # описании трижды: по релевантности оно должно быть первым.
+        Title.objects.create(
+            name='Золото Рейна', year=1869,
+            description='О кольце, проклятом кольце и кольце нибелунга'
+        ),
+    ]
+
+
+def search(value):
+    response = APIClient().get('/api/v1/titles/', {'search': value})
+    assert response.status_code == 200
+    return [title['name'] for title in response.data['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTitleSearch:
+
+    def test_search_ranks_by_relevance(self, titles):
+        assert search('кольце') == [
+            'Золото Рейна', 'Властелин колец', 'Хоббит'
+        ], 'Проверьте, что результаты поиска упорядочены по релевантности'
+        assert search('кольце сокровищами') == ['Хоббит']
+        assert search('Дюна') == ['Дюна']
+        assert search('Властелин кольце') == ['Властелин колец'], (
+            'Проверьте, что поиск требует совпадения всех слов запроса'
+        )
+        assert search('"(*') == []
+
+    def test_search_index_follows_writes(self, titles):
+        dune = titles[2]
+        dune.name = 'Мессия Дюны'
+        dune.description = 'Продолжение'
+        dune.save()
+        assert search('Мессия') == ['Мессия Дюны'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения'
+        )
+        assert search('пряность') == []
+        dune.delete()
+        assert search('Мессия') == []
+
+    def test_cursor_pagination_rejected(self, titles):
+        response = APIClient().get(
+            '/api/v1/titles/', {'search': 'кольце', 'pagination': 'cursor'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что курсорная пагинация с поиском возвращает 400'
+        )
+        assert 'pagination' in response.data
@@ -0,0 +1,134 @@
+import logging
+import re
+import time
+
+import pytest
+from django.db import connection
+from django.http import Http404, HttpResponseNotFound
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient
+from reviews.models import Review, Title
+from users.models import User
+
+from api_yamdb.timing import ServerTimingMiddleware
+
+
+def parse(header):
+    metrics = {}
+    for part in header.split(', '):
+        name, *params = part.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+def durations(response):
+    return {
+        name: float(params['dur'])
+        for name, params in parse(response['Server-Timing']).items()
+    }
+
+
+@pytest.fixture(autouse=True)
+def server_timing_header(settings):
+    settings.SERVER_TIMING_HEADER = True
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+
+    def test_header(self):
+        Title.objects.create(name='Фильм', year=2000)
+        with CaptureQueriesContext(connection) as context:
+            response = APIClient().get('/api/v1/titles/')
+        metrics = parse(response['Server-Timing'])
+        assert set(metrics) == {'db', 'view', 'render', 'total'}
+        assert metrics['db']['desc'] == (
+            f'"{len(context.captured_queries)} queries"'
+        ), 'Проверьте, что Server-Timing считает запросы к базе'
+        durations = {
+            name: float(params['dur']) for name, params in metrics.items()
+        }
+        assert durations['total'] >= durations['view'] >= durations['db']
+
+    def test_header_disabled(self, settings):
+        settings.SERVER_TIMING_HEADER = False
+        response = APIClient().get('/api/v1/titles/')
+        assert 'Server-Timing' not in response
+
+    def test_slow_request_logged(self, settings, caplog):
+        settings.SLOW_REQUEST_THRESHOLDS = {'default': 10000, 'title-list': 0}
+        with caplog.at_level(logging.WARNING, logger='api_yamdb.timing'):
+            APIClient().get('/api/v1/categories/')
+            assert not caplog.records, (
+                'Проверьте, что пороги задаются по имени маршрута'
+            )
+            APIClient().get('/api/v1/titles/?year_min=2000')
+        [record] = caplog.records
+        message = record.getMessage()
+        assert 'GET /api/v1/titles/?year_min=2000 (200)' in message
+        assert re.search(r'ms: SELECT .*reviews_title', message), (
+            'Проверьте, что в лог попадают SQL-запросы'
+        )
+
+    def test_view_exception(self):
+        request = RequestFactory().get('/api/v1/titles/')
+        request.resolver_match = resolve('/api/v1/titles/')
+
+        def get_response(request):
+            middleware.process_view(
+                request, request.resolver_match.func, (), {}
+            )
+            time.sleep(0.02)
+            middleware.process_exception(request, Http404())
+            time.sleep(0.02)
+            return HttpResponseNotFound()
+
+        middleware = ServerTimingMiddleware(get_response)
+        metrics = durations(middleware(request))
+        assert 20 <= metrics['view'] < 40, (
+            'Проверьте, что время view заканчивается на исключении view'
+        )
+        assert metrics['render'] >= 20, (
+            'Проверьте, что ответ на исключение входит в render'
+        )
+
+    def test_streaming_queries_logged(self, settings, caplog):
+        settings.SLOW_REQUEST_THRESHOLDS = {'default': 0}
+        title = Title.objects.create(name='Фильм', year=2000)
+        for i in range(3):
+            author = User.objects.create(
+                username=f'user{i}', email=f'user{i}@ya.ru')
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=5)
+        client = APIClient()
+        client.force_authenticate(User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin'))
+        with caplog.at_level(logging.WARNING, logger='api_yamdb.timing'):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/?stream=true'
+            )
+            assert response.streaming
+            assert not caplog.records, (
+                'Проверьте, что потоковый ответ попадает в лог после '
+                'чтения тела'
+            )
+            header = parse(response['Server-Timing'])
+            b''.join(response.streaming_content)
+        [record] = caplog.records
+        queries = int(re.search(r'in (\d+) queries', record.getMessage())[1])
+        assert queries > int(header['db']['desc'].strip('"').split()[0]), (
+            'Проверьте, что запросы при чтении потокового ответа '
+            'попадают в лог медленных запросов'
+        )
+
+
+class TestServerTimingDefault:
+
+    def test_follows_debug(self):
+        from api_yamdb import settings
+        assert settings.SERVER_TIMING_HEADER is settings.DEBUG, (
+            'Проверьте, что Server-Timing по умолчанию включён только '
+            'с DEBUG'
+        )
@@ -0,0 +1,170 @@
+import json
+import re
+import time
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+from reviews.models import Review, Title
+from users.models import User
+
+from api_yamdb import slowqueries
+
+
+@pytest.fixture(autouse=True)
+def slow_query_log(settings):
+    settings.SLOW_QUERY_LOG = True
+    settings.SLOW_QUERY_THRESHOLD = 0
+    slowqueries.log.clear()
+    yield slowqueries.log
+    slowqueries.log.clear()
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create(
+        username='admin', email='admin@ya.ru', role='admin')
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+@pytest.fixture
+def title():
+    author = User.objects.create(username='author', email='author@ya.ru')
+    title = Title.objects.create(name='Фильм', year=2000)
+    Review.objects.create(title=title, author=author, text='Текст', score=5)
+    slowqueries.log.clear()
+    return title
+
+
+class TestNormalizeSql:
+
+    def test_values_replaced(self):
+        assert slowqueries.normalize_sql(
+            'SELECT  "id" FROM "t"\n WHERE "name" = \'O\'\'Hara\' '
+            'AND "year" > 2000 AND "id" IN (%s, %s, %s) LIMIT 21'
+        ) == (
+            'SELECT "id" FROM "t" WHERE "name" = ? '
+            'AND "year" > ? AND "id" IN (...) LIMIT ?'
+        ), 'Проверьте, что значения в SQL заменяются на ?'
+
+    def test_identifiers_kept(self):
+        assert slowqueries.normalize_sql(
+            'SELECT U0."id" FROM "reviews_genre_title" U0'
+        ) == 'SELECT U0."id" FROM "reviews_genre_title" U0'
+
+
+@pytest.mark.django_db
+class TestSlowQueryLog:
+
+    def test_disabled(self, settings, title):
+        settings.SLOW_QUERY_LOG = False
+        APIClient().get(f'/api/v1/titles/{title.id}/reviews/')
+        assert not slowqueries.log.snapshot(), (
+            'Проверьте, что журнал медленных запросов выключен по умолчанию'
+        )
+
+    def test_threshold(self, settings, title):
+        settings.SLOW_QUERY_THRESHOLD = 10000
+        APIClient().get(f'/api/v1/titles/{title.id}/reviews/')
+        assert not slowqueries.log.snapshot()
+
+    def test_entry(self, title):
+        APIClient().get(f'/api/v1/titles/{title.id}/reviews/')
+        entries = slowqueries.log.snapshot()
+        [entry] = [
+            entry for entry in entries
+            if 'FROM "reviews_review"' in entry['sql']
+            and 'COUNT' not in entry['sql']
+        ]
+        assert entry['route'] == 'review-list'
+        assert entry['view'] == 'ReviewViewSet'
+        assert str(title.id) not in entry['sql'].split('WHERE')[1], (
+            'Проверьте, что в журнал попадает SQL без параметров'
+        )
+        assert entry['call_site'].startswith('api/'), (
+            'Проверьте, что в журнал попадает место вызова в коде проекта'
+        )
+        assert entry['explain'], (
+            'Проверьте, что для SELECT сохраняется план EXPLAIN'
+        )
+        assert entries == sorted(
+            entries, key=lambda entry: entry['id'], reverse=True
+        )
+
+    def test_explain_not_recorded(self, title):
+        Title.objects.get(id=title.id)
+        entries = slowqueries.log.snapshot()
+        assert len(entries) == 1
+        assert 'EXPLAIN' not in entries[0]['sql']
+        assert entries[0]['view'] is None
+
+    def test_not_counted_in_server_timing(self, settings, monkeypatch,
+                                          title):
+        settings.SERVER_TIMING_HEADER = True
+        def slow_explain(*args):
+            time.sleep(0.05)
+
+        monkeypatch.setattr(slowqueries, 'explain', slow_explain)
+        response = APIClient().get(f'/api/v1/titles/{title.id}/reviews/')
+        assert slowqueries.log.snapshot()
+        db = re.search(r'db;dur=([\d.]+)', response['Server-Timing'])
+        assert float(db.group(1)) < 50, (
+            'Проверьте, что EXPLAIN не входит во время запросов к базе'
+        )
+
+    def test_locking_select_not_explained(self):
+        assert slowqueries.explain(
+            connection, 'SELECT "id" FROM "t" WHERE "id" = %s FOR UPDATE',
+            (1,)
+        ) is None
+
+    def test_ring_buffer(self, settings, title):
+        settings.SLOW_QUERY_LOG_SIZE = 3
+        for _ in range(5):
+            Title.objects.get(id=title.id)
+        entries = slowqueries.log.snapshot()
+        assert len(entries) == 3, (
+            'Проверьте, что журнал хранит не больше SLOW_QUERY_LOG_SIZE '
+            'запросов'
+        )
+        assert entries[0]['id'] - entries[-1]['id'] == 2
+
+
+@pytest.mark.django_db
+class TestSlowQueriesView:
+
+    def test_admin_only(self):
+        user = User.objects.create(username='user', email='user@ya.ru')
+        client = APIClient()
+        client.force_authenticate(user)
+        assert client.get('/api/v1/slow-queries/').status_code == 403
+
+    def test_list(self, admin_client, title):
+        APIClient().get(f'/api/v1/titles/{title.id}/reviews/')
+        response = admin_client.get('/api/v1/slow-queries/')
+        assert response.status_code == 200
+        assert 'review-list' in {entry['route'] for entry in response.json()}
+
+    def test_export(self, admin_client, title):
+        APIClient().get(f'/api/v1/titles/{title.id}/reviews/')
+        response = admin_client.get('/api/v1/slow-queries/?output=ndjson')
+        assert response.status_code == 200
+        assert response['Content-Disposition'] == (
+            'attachment; filename="slow-queries.ndjson"'
+        )
+        entries = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        assert 'review-list' in {entry['route'] for entry in entries}
+        assert admin_client.get(
+            '/api/v1/slow-queries/?output=xml'
+        ).status_code == 404
+
+    def test_clear(self, admin_client, title):
+        APIClient().get(f'/api/v1/titles/{title.id}/reviews/')
+        response = admin_client.delete('/api/v1/slow-queries/')
+        assert response.status_code == 204
+        assert not slowqueries.log.snapshot()
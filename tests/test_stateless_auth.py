@@ -0,0 +1,138 @@
+import pytest
+from api.authentication import user_cache
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reviews.models import Title
+from users.models import User
+
+
+def get_token(user):
+    response = APIClient().post('/api/v1/auth/token/', {
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == 201
+    return response.data['token']
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }
+    settings.TOKEN_VERSION_CACHE_ALIAS = 'shared'
+
+
+def client_for(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db
+class TestStatelessAuth:
+
+    def test_no_user_lookup(self, shared_cache):
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        client = client_for(get_token(admin))
+        client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                '/api/v1/categories/', {'name': 'Фильмы', 'slug': 'movies'})
+        assert response.status_code == 201
+        assert not [
+            query for query in context.captured_queries
+            if 'users_user' in query['sql']
+        ], 'Проверьте, что аутентификация не обращается к таблице users_user'
+
+    def test_role_change_revokes_tokens(self):
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        moderator = User.objects.create(
+            username='moder', email='moder@ya.ru', role='moderator')
+        moderator_client = client_for(get_token(moderator))
+        assert moderator_client.get('/api/v1/users/me/').status_code == 200
+        response = client_for(get_token(admin)).patch(
+            '/api/v1/users/moder/', {'role': 'user'})
+        assert response.status_code == 200
+        response = moderator_client.get('/api/v1/users/me/')
+        assert response.status_code == 401, (
+            'Проверьте, что смена роли отзывает выданные токены'
+        )
+        assert client_for(get_token(moderator)).get(
+            '/api/v1/users/me/').data['role'] == 'user'
+
+    def test_review_author_from_token(self):
+        title = Title.objects.create(name='Произведение', year=2000)
+        user = User.objects.create(username='user', email='user@ya.ru')
+        response = client_for(get_token(user)).post(
+            f'/api/v1/titles/{title.id}/reviews/', {'text': 'Ок', 'score': 5})
+        assert response.status_code == 201
+        assert response.data['author'] == 'user'
+
+    def test_process_local_cache(self):
+        user = User.objects.create(username='user', email='user@ya.ru')
+        client = client_for(get_token(user))
+        assert client.get('/api/v1/users/me/').status_code == 200
+        # Отзыв в другом воркере: кеш этого процесса не сброшен.
+        User.objects.filter(pk=user.pk).update(token_version=1)
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что с локальным кешем процесса версия токена '
+            'читается из базы'
+        )
+
+    def test_deleted_user(self, shared_cache):
+        user = User.objects.create(username='user', email='user@ya.ru')
+        client = client_for(get_token(user))
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user_cache.invalidate(user.pk)
+        user.delete()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 401, (
+            'Проверьте, что токен удалённого пользователя не приводит к 500'
+        )
+
+    def test_admin_update_visible_in_me(self):
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        user = User.objects.create(username='bob', email='b@a.ru')
+        client = client_for(get_token(user))
+        assert client.get('/api/v1/users/me/').data['email'] == 'b@a.ru'
+        response = client_for(get_token(admin)).patch(
+            '/api/v1/users/bob/', {'email': 'bob@ya.ru', 'bio': 'Новое'})
+        assert response.status_code == 200
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200, (
+            'Проверьте, что изменение профиля без смены роли не отзывает '
+            'токены'
+        )
+        assert (response.data['email'], response.data['bio']) == (
+            'bob@ya.ru', 'Новое'
+        ), 'Проверьте, что /users/me/ отдаёт актуальные данные'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_deactivation_revokes_tokens(self, shared_cache):
+        user = User.objects.create(username='user', email='user@ya.ru')
+        client = client_for(get_token(user))
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что блокировка пользователя отзывает токены'
+        )
+        user.refresh_from_db()
+        assert user.token_version == 1
+        user.last_login = timezone.now()
+        user.save()
+        assert User.objects.get(pk=user.pk).token_version == 1, (
+            'Проверьте, что сохранение пользователя не откатывает версию '
+            'токена'
+        )
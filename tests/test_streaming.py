@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from api.views import (CommentViewSet, ReviewViewSet, TitleViewSet,
+                       UsersViewSet)
+from rest_framework.test import APIClient
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create(
+        username='admin', email='admin@ya.ru', role='admin')
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    for viewset in (TitleViewSet, ReviewViewSet, CommentViewSet,
+                    UsersViewSet):
+        monkeypatch.setattr(viewset, 'stream_chunk_size', 4)
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genre = Genre.objects.create(name='Драма', slug='drama')
+    titles = []
+    for i in range(11):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000 + i, category=category)
+        title.genre.set([genre])
+        titles.append(title)
+    for i in range(9):
+        author = User.objects.create(
+            username=f'user{i}', email=f'user{i}@ya.ru')
+        review = Review.objects.create(
+            title=titles[0], author=author, text=f'Отзыв {i}', score=5)
+        Comment.objects.create(review=review, author=author, text='text')
+        Comment.objects.create(
+            review=titles[0].reviews.first(), author=author, text=f'{i}')
+    return titles[0]
+
+
+def read_all(client, url):
+    items = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        items.extend(response.data['results'])
+        url = response.data['next']
+    return json.loads(json.dumps(items))
+
+
+def stream(client, url):
+    separator = '&' if '?' in url else '?'
+    response = client.get(f'{url}{separator}stream=true')
+    assert response.status_code == 200
+    assert response.streaming, (
+        'Проверьте, что ?stream=true возвращает потоковый ответ'
+    )
+    chunks = list(response.streaming_content)
+    return json.loads(b''.join(chunks)), chunks
+
+
+@pytest.mark.django_db
+class TestStreamingList:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/',
+        '/api/v1/titles/{title_id}/reviews/',
+        '/api/v1/titles/{title_id}/reviews/?include=comments',
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        '/api/v1/users/',
+    ])
+    def test_same_items_as_pages(self, admin_client, title, url):
+        url = url.format(
+            title_id=title.pk, review_id=title.reviews.first().pk)
+        data, chunks = stream(admin_client, url)
+        assert data == read_all(admin_client, url), (
+            'Проверьте, что поток содержит те же объекты, что и страницы'
+        )
+        assert len(chunks) > 2, (
+            'Проверьте, что ответ отдаётся пачками'
+        )
+
+    def test_filters_apply(self, admin_client, title):
+        data, _ = stream(admin_client, '/api/v1/titles/?year_max=2001')
+        assert [item['year'] for item in data] == [2000, 2001]
+
+    def test_empty_list(self, admin_client):
+        data, _ = stream(admin_client, '/api/v1/titles/')
+        assert data == []
+
+    def test_admin_only(self, title):
+        response = APIClient().get('/api/v1/titles/', {'stream': 'true'})
+        assert response.status_code == 401
+        client = APIClient()
+        client.force_authenticate(User.objects.get(username='user0'))
+        response = client.get('/api/v1/titles/', {'stream': 'true'})
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/999/reviews/?stream=true',
+        '/api/v1/titles/999/reviews/1/comments/?stream=true',
+    ])
+    def test_missing_parent(self, admin_client, url):
+        assert admin_client.get(url).status_code == 404, (
+            'Проверьте, что поток вложенного списка возвращает 404 для '
+            'несуществующего родителя'
+        )
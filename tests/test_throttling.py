@@ -0,0 +1,152 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from api.throttling import UsernameThrottle, get_cache
+from django.contrib.auth.tokens import default_token_generator
+from django.core.checks import Error, Warning
+from rest_framework.test import APIClient
+from users.models import User
+
+from api_yamdb.checks import check_shared_caches
+
+RATES = {
+    'signup_ip': '4/min',
+    'signup_username': '2/min',
+    'token_ip': '3/min',
+    'token_username': '2/min',
+}
+
+
+@pytest.fixture(autouse=True)
+def rates(settings):
+    settings.AUTH_THROTTLE_RATES = RATES
+
+
+def signup(username, address='10.0.0.1'):
+    return APIClient().post(
+        '/api/v1/auth/signup/',
+        {'username': username, 'email': f'{username}@ya.ru'},
+        REMOTE_ADDR=address
+    )
+
+
+@pytest.mark.django_db
+class TestAuthThrottling:
+
+    def test_username_bucket(self):
+        assert signup('user').status_code == 200
+        assert signup('user').status_code == 200
+        response = signup('user')
+        assert response.status_code == 429, (
+            'Проверьте, что повторная регистрация одного имени ограничена'
+        )
+        assert int(response['Retry-After']) > 0
+        assert signup('USER', '10.0.0.2').status_code == 429
+        assert signup('other').status_code == 200
+
+    def test_ip_bucket(self):
+        for i in range(4):
+            assert signup(f'user{i}').status_code == 200
+        assert signup('user4').status_code == 429, (
+            'Проверьте, что регистрация с одного IP ограничена'
+        )
+        assert signup('user4', '10.0.0.2').status_code == 200
+
+    def test_bucket_refills(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr('api.throttling.time.time', lambda: now[0])
+        signup('user')
+        signup('user')
+        assert signup('user').status_code == 429
+        now[0] += 30
+        assert signup('user').status_code == 200, (
+            'Проверьте, что ведро пополняется со временем'
+        )
+        assert signup('user').status_code == 429
+
+    def test_token_endpoint(self):
+        user = User.objects.create(username='user', email='user@ya.ru')
+        client = APIClient()
+        data = {'username': 'user', 'confirmation_code': 'wrong'}
+        assert client.post('/api/v1/auth/token/', data).status_code == 400
+        assert client.post('/api/v1/auth/token/', data).status_code == 400
+        data['confirmation_code'] = default_token_generator.make_token(user)
+        assert client.post('/api/v1/auth/token/', data).status_code == 429, (
+            'Проверьте, что подбор кода подтверждения ограничен'
+        )
+
+    def test_rejection_stats(self):
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role='admin')
+        for _ in range(3):
+            signup('user')
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get('/api/v1/auth/throttle-stats/')
+        assert response.status_code == 200
+        assert response.data == {
+            'signup_ip': 0,
+            'signup_username': 1,
+            'token_ip': 0,
+            'token_username': 0,
+        }
+
+    def test_concurrent_requests(self, monkeypatch):
+        cache = get_cache()
+        get = cache.get
+
+        def slow_get(*args, **kwargs):
+            # Окно между чтением и записью ведра, в которое попадают
+            # одновременные запросы.
+            value = get(*args, **kwargs)
+            time.sleep(0.01)
+            return value
+
+        monkeypatch.setattr(cache, 'get', slow_get)
+        # caches[alias] у каждого потока свой, подменяем кеш целиком.
+        monkeypatch.setattr('api.throttling.get_cache', lambda: cache)
+        request = SimpleNamespace(data={'username': 'user'})
+        view = SimpleNamespace(throttle_scope='signup')
+        allowed = []
+
+        def check():
+            allowed.append(UsernameThrottle().allow_request(request, view))
+
+        threads = [threading.Thread(target=check) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert allowed.count(True) == 2, (
+            'Проверьте, что одновременные запросы не проходят сверх лимита'
+        )
+
+
+class TestSharedCacheCheck:
+
+    def test_process_local_cache(self, settings):
+        [warning] = [
+            message for message in check_shared_caches(None)
+            if 'THROTTLE_CACHE_ALIAS' in message.msg
+        ]
+        assert isinstance(warning, Warning)
+        settings.SHARED_CACHE_REQUIRED = True
+        assert all(
+            isinstance(message, Error)
+            for message in check_shared_caches(None)
+        ), 'Проверьте, что локальный кеш процесса — ошибка, если нужен общий'
+
+    def test_shared_cache(self, settings, tmp_path):
+        settings.SHARED_CACHE_REQUIRED = True
+        settings.CACHES = {
+            **settings.CACHES,
+            'shared': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(tmp_path),
+            },
+        }
+        settings.THROTTLE_CACHE_ALIAS = 'shared'
+        settings.TOKEN_VERSION_CACHE_ALIAS = 'shared'
+        assert check_shared_caches(None) == []
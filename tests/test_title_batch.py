@@ -0,0 +1,71 @@
+import pytest
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Title
+from users.models import User
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create(
+        username='admin', email='admin@ya.ru', role='admin')
+    client = APIClient()
+    client.force_authenticate(admin)
+    Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.create(name='Драма', slug='drama')
+    Genre.objects.create(name='Комедия', slug='comedy')
+    return client
+
+
+@pytest.mark.django_db
+class TestTitleBatch:
+
+    def test_single_create_sets_genres(self, admin_client):
+        response = admin_client.post('/api/v1/titles/', {
+            'name': 'Фильм', 'year': 2000, 'category': 'movie',
+            'genre': ['drama', 'comedy'],
+        })
+        assert response.status_code == 201
+        title = Title.objects.get()
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ]
+
+    def test_batch_create_and_update(self, admin_client):
+        existing = Title.objects.create(name='Старое', year=1990)
+        existing.genre.add(Genre.objects.get(slug='comedy'))
+        response = admin_client.post('/api/v1/titles/batch/', [
+            {'name': 'Первый', 'year': 2001, 'category': 'movie',
+             'genre': ['drama']},
+            {'name': 'Второй', 'year': 2002, 'category': 'movie',
+             'genre': ['drama', 'comedy']},
+            {'id': existing.id, 'name': 'Новое', 'year': 1991,
+             'category': 'movie', 'genre': ['drama']},
+        ], format='json')
+        assert response.status_code == 201, response.data
+        assert len(response.data) == 3
+        existing.refresh_from_db()
+        assert existing.name == 'Новое'
+        assert list(existing.genre.values_list('slug', flat=True)) == [
+            'drama'
+        ], 'Проверьте, что пакетное изменение заменяет жанры произведения'
+        assert Title.objects.count() == 3
+
+    def test_batch_reports_item_errors(self, admin_client):
+        response = admin_client.post('/api/v1/titles/batch/', [
+            {'name': 'Первый', 'year': 2001, 'category': 'movie',
+             'genre': ['drama']},
+            {'name': 'Второй', 'year': 3000, 'category': 'books',
+             'genre': ['horror']},
+        ], format='json')
+        assert response.status_code == 400
+        assert response.data[0] == {}
+        assert set(response.data[1]) == {'year', 'category', 'genre'}, (
+            'Проверьте, что ошибки возвращаются для каждого элемента'
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибках пачка не сохраняется'
+        )
+
+    def test_batch_requires_admin(self):
+        response = APIClient().post('/api/v1/titles/batch/', [], format='json')
+        assert response.status_code == 401
@@ -0,0 +1,64 @@
+import pytest
+from api.serializers import ReadTitleSerializer
+from api.views import TitleViewSet
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title
+from users.models import User
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(3)
+    ]
+    author = User.objects.create(username='user', email='user@ya.ru')
+    other = User.objects.create(username='other', email='other@ya.ru')
+    rated = Title.objects.create(
+        name='С оценками', year=1994, category=category,
+        description='Описание "в кавычках"'
+    )
+    rated.genre.set([genres[2], genres[0]])
+    Review.objects.create(title=rated, author=author, text='text', score=10)
+    Review.objects.create(title=rated, author=other, text='text', score=7)
+    Title.objects.create(name='Без категории и жанров', year=2000)
+    single = Title.objects.create(name='Один жанр', year=2010,
+                                  category=category)
+    single.genre.set([genres[1]])
+    return Title.objects.order_by('id')
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+class TestTitleRows:
+
+    def test_parity_with_serializer(self, titles):
+        queryset = TitleViewSet.queryset.all()
+        expected = render(ReadTitleSerializer(queryset, many=True).data)
+        response = APIClient().get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert render(response.data['results']) == expected, (
+            'Проверьте, что быстрый список совпадает с ReadTitleSerializer'
+        )
+
+    def test_parity_with_detail(self, titles):
+        client = APIClient()
+        results = client.get('/api/v1/titles/').data['results']
+        for item in results:
+            detail = client.get(f'/api/v1/titles/{item["id"]}/')
+            assert render(item) == render(detail.data)
+
+    def test_filters_and_cursor(self, titles):
+        client = APIClient()
+        response = client.get('/api/v1/titles/?category=movie')
+        assert [item['name'] for item in response.data['results']] == [
+            'С оценками', 'Один жанр']
+        response = client.get('/api/v1/titles/?pagination=cursor')
+        assert response.status_code == 200
+        assert len(response.data['results']) == 3
+        assert response.data['results'][0]['rating'] == 8.5
@@ -0,0 +1,63 @@
+import runpy
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from reviews.models import Category
+
+from api_yamdb import warmup
+from api_yamdb.warmup import warm_up
+
+GUNICORN_CONF = Path(warmup.__file__).parent.parent / 'gunicorn.conf.py'
+
+
+# open_connections открывает соединения со всеми базами, включая реплику
+# из conftest.
+@pytest.mark.django_db(databases=['default', 'replica'])
+class TestWarmup:
+
+    def test_primes_catalog_cache(self, settings):
+        Category.objects.create(name='Фильм', slug='movie')
+        warm_up()
+        client = APIClient(HTTP_HOST=settings.WARMUP_HOST)
+        for path in settings.WARMUP_URLS:
+            response = client.get(path)
+            assert response.status_code == 200
+            assert response['X-Cache'] == 'HIT', (
+                f'Проверьте, что прогрев заполняет кеш для {path}'
+            )
+
+    def test_selected_steps(self, settings):
+        timings = warm_up(('import_apps', 'build_urls'))
+        assert [name for name, _ in timings] == ['import_apps', 'build_urls']
+        response = APIClient(HTTP_HOST=settings.WARMUP_HOST).get(
+            '/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+
+    def test_command(self):
+        out = StringIO()
+        call_command('warmup', stdout=out)
+        assert 'prime_caches' in out.getvalue()
+        assert 'Прогрев занял' in out.getvalue()
+
+    def test_post_fork_best_effort(self, monkeypatch):
+        def unavailable():
+            raise OSError('database is unavailable')
+
+        monkeypatch.setattr(warmup, 'WARMUP_STEPS', tuple(
+            (name, unavailable if name == 'open_connections' else step)
+            for name, step in warmup.WARMUP_STEPS
+        ))
+        server = mock.Mock()
+        runpy.run_path(str(GUNICORN_CONF))['post_fork'](
+            server, mock.Mock(pid=1)
+        )
+        [warning] = server.log.warning.call_args_list
+        assert 'open_connections' in warning.args, (
+            'Проверьте, что ошибка прогрева не останавливает воркер'
+        )
+        [info] = server.log.info.call_args_list
+        assert 'prime_caches' in info.args
@@ -48,3 +48,15 @@ class TestWorkflow:
             'Проверьте, что настроили отправку telegram сообщения '
             f'в файл {filename}'
         )
+
+    def test_github_workflow_matches(self):
+        with open(os.path.join(root_dir, 'yamdb_workflow.yml')) as f:
+            workflow = f.read()
+        with open(os.path.join(
+            root_dir, '.github', 'workflows', 'yamdb_workflow.yml'
+        )) as f:
+            github_workflow = f.read()
+        assert github_workflow == workflow, (
+            'Проверьте, что .github/workflows/yamdb_workflow.yml совпадает '
+            'с yamdb_workflow.yml'
+        )